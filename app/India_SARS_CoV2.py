@@ -1,28 +1,40 @@
-import os, re, sys, math, json, bokeh, geopandas, \
+import os, sys, math, time, bokeh, \
        numpy as np, pandas as pd
 
-from jinja2 import Template
+from functools import partial
+
 from packaging import version
 from bokeh.themes import Theme
 from bokeh.io.doc import curdoc
 from bokeh.layouts import layout
 from bokeh.plotting import figure
 from bokeh.models.glyphs import Text
-from scipy.interpolate import interp1d
-from datetime import datetime, timedelta
-from bokeh.application import Application
 from bokeh.models.callbacks import CustomJS
 from bokeh.plotting import show as plt_show
 from bokeh.palettes import brewer, OrRd, YlGn
 from bokeh.models.widgets import Button, Select
 from bokeh.io import output_notebook, show, output_file
-from bokeh.application.handlers import FunctionHandler
 from bokeh.plotting import save, figure, output_file as out_file
 from bokeh.models import ColumnDataSource, Slider, HoverTool, InlineStyleSheet,              \
-                         Select, Div, Range1d, WMTSTileSource, BoxZoomTool, TapTool, Tabs
-from bokeh.models import GeoJSONDataSource, LinearColorMapper, ColorBar,                     \
+                         Select, Div, Range1d, WMTSTileSource, BoxZoomTool, TapTool, Tabs,  \
+                         WheelZoomTool, Patches
+from bokeh.models import LinearColorMapper, ColorBar,                                        \
                          NumeralTickFormatter, LinearAxis, Grid, Label, Band,                \
-                         Legend, LegendItem
+                         Legend, LegendItem, CustomJSTickFormatter, CustomJSTransform
+from bokeh.transform import transform
+from bokeh.events import RangesUpdate
+
+from sars_cov2_data import apply_corrections, merge_on_state, get_local_asset, prefetch_assets, shared_datasets, region_datasets, \
+                            REGION_WARMUP_COUNT, connection_pool
+from sars_cov2_geometry import geometry_lod_level, attribute_columns, merge_attribute_columns, compiled_geometry, \
+                              read_projected_geometry, explode_geometry
+from sars_cov2_generations import DatasetGeneration, open_generation, generation_key, current_generation_key, pack_records
+from sars_cov2_sessions import session_registry, start_session_stats_logging, stop_session_stats_logging
+from sars_cov2_templates import document_templates
+from sars_cov2_decimation import series_window, decimation_indices, decimate_series, SERIES_DECIMATION_POINTS
+from sars_cov2_loader import SessionLoads, dataset_loader
+from sars_cov2_refresh import DataFileWatcher, DataRefreshService, column_patches, stream_rows, patch_source, \
+                             REFRESH_INTERVAL
 
 bokeh_version = bokeh.__version__ 
 bokeh_version_msg = 'Generating SARS-CoV2 state-wise statistics overlay for India using Bokeh visualization library version: '
@@ -73,18 +85,21 @@ HTML_FONT = 'Times New Roman' # 'Serif' #
 HTML_INT_FORMATTER_STR = '{(0,0)}'
 HTML_FLOAT_FORMATTER_STR = '{(0.000)}'
 
-def apply_corrections(input_df:'Pandas dataframe')->'Pandas dataframe':
-  for state in list(input_df['state'].values):
-    input_df.loc[input_df['state']==state,'state']=re.sub('[^A-Za-z ]+', '',str(state))
-  input_df.loc[input_df['state']=='Karanataka','state']='Karnataka' 
-  input_df.loc[input_df['state']=='Himanchal Pradesh','state']='Himachal Pradesh' 
-  input_df.loc[input_df['state']=='Telengana','state']='Telangana'  
-  input_df.loc[input_df['state']=='Dadra and Nagar Haveli','state']='Dadra and Nagar Haveli and Daman and Diu'
-  input_df.loc[input_df['state']=='Dadar Nagar Haveli','state']='Dadra and Nagar Haveli and Daman and Diu'
-  input_df.loc[input_df['state']=='Dadra Nagar Haveli','state']='Dadra and Nagar Haveli and Daman and Diu'
-  input_df.loc[input_df['state']=='Daman & Diu','state']='Dadra and Nagar Haveli and Daman and Diu'
-  input_df.loc[input_df['state']=='Daman and Diu','state']='Dadra and Nagar Haveli and Daman and Diu'
-  return input_df
+MODEL_PERFORMANCE_SERIES_VERSION = 3
+MODEL_PERFORMANCE_DATE_FORMAT = '%d-%B-%Y'
+MODEL_PERFORMANCE_COLUMNS = {
+  'y_cases': 'total_cases',
+  'y_preds': 'preds_cases',
+  'y_preds3': 'preds_cases_3',
+  'y_preds7': 'preds_cases_7',
+  'y_std': 'preds_cases_std',
+  'y_3std': 'preds_cases_3_std',
+  'y_7std': 'preds_cases_7_std'
+}
+MODEL_PERFORMANCE_BAND_SIGMA = float(os.environ.get('SARS_COV2_BAND_SIGMA', 3))
+CLIENT_REGION_SWITCHING = os.environ.get('SARS_COV2_CLIENT_REGION_SWITCHING', '0').lower() in ('1', 'true', 'yes')
+INDIA_TOTALS_SOURCE_NAME = 'sars_cov2_india_totals'
+MODEL_PERFORMANCE_DECIMATION_COLUMNS = ('y_cases', 'y_preds', 'y_preds3', 'y_preds7')
 
 def os_style_formatter(input_str:str)->str:
   try:
@@ -95,141 +110,205 @@ def os_style_formatter(input_str:str)->str:
     print(f'Failed to detect the OS environment due to: {e} ...')
   return str(input_str).replace('/', "\\") if os_env=='Windows_NT' else str(input_str)  
 
-try:
-  India_statewise = geopandas.read_file(f'{DATA_URL}{GEOJSON_FILENAME_POINTER_STR}')
-  India_stats = pd.read_csv(f'{DATA_URL}{POPUL_STATS_CSV_FILENAME_POINTER_STR}')
-  sars_cov2_data = pd.read_csv(f'{DATA_URL}{SARSCOV2_STATS_CSV_FILENAME_POINTER_STR}')
-  preds_df = pd.read_csv(f'{DATA_URL}{SARSCOV2_FORECASTS_FILENAME_POINTER_STR}')
-except Exception as e:
-  e = getattr(e, 'message', repr(e))
-  print(f'Failed reading URL data due to: {e} ...')
-  if os.path.exists(os_style_formatter(ALT_LOCAL_DATA_DIR)):
-    LOCAL_DATA_DIR = ALT_LOCAL_DATA_DIR
-  India_GeoJSON_repoFile = os_style_formatter(
-      f'{LOCAL_DATA_DIR}{GEOJSON_FILENAME_POINTER_STR}'
-  ) 
-  sars_cov2_statewise_repoFile = os_style_formatter(
-      f'{LOCAL_DATA_DIR}{SARSCOV2_STATS_CSV_FILENAME_POINTER_STR}'
+if os.path.exists(os_style_formatter(ALT_LOCAL_DATA_DIR)):
+  LOCAL_DATA_DIR = ALT_LOCAL_DATA_DIR
+
+def local_data_file(pointer:str)->'str or None':
+  return get_local_asset(
+    pointer,
+    DATA_URL,
+    local_dirs=[os_style_formatter(LOCAL_DATA_DIR), os_style_formatter(ALT_LOCAL_DATA_DIR)]
+  )
+
+def merge_sars_cov2_geometry(sars_cov2_df:'Pandas dataframe', geo_df:'Pandas dataframe', verbose:bool=False)->'Pandas dataframe':
+    merged_df = merge_on_state(geo_df, sars_cov2_df, how='left')
+
+    try:
+      merged_df = merged_df.fillna(0)
+    except Exception as e:
+      e = getattr(e, 'message', repr(e))
+      print(f'Failed removing NaN values in the merged dataframe due to: {e} ...')
+      merged_df.fillna({'total_cases': 0}, inplace=True)
+      merged_df.fillna({'deaths': 0}, inplace=True)
+      merged_df.fillna({'discharged': 0}, inplace=True)
+
+      if verbose:
+        print('Consider updating GeoPandas library ...')
+
+    return merged_df
+
+def sars_cov2_columns(sars_cov2_df:'Pandas dataframe', geo_df:'Pandas dataframe', verbose:bool=False)->dict:
+    merged_df = merge_sars_cov2_geometry(sars_cov2_df, geo_df, verbose=verbose)
+    return {'column_data': attribute_columns(merged_df), 'data_frame': merged_df}
+
+def map_source_data(attributes, geometry)->dict:
+    source_data = dict(attributes)
+    source_data.update({column: list(values) for column, values in geometry.items()})
+    return source_data
+
+def marker_source_data(attributes, markers)->dict:
+    source_data = {column: np.asarray(values)[markers['row']] for column, values in attributes.items()}
+    source_data.update({'x': markers['x'], 'y': markers['y']})
+    return source_data
+
+def forecast_dataset(sars_cov2_data_copy:'Pandas dataframe', preds_df:'Pandas dataframe', 
+                     India_statewise:'Pandas dataframe')->dict:
+  if verbose:
+    print(preds_df.head(10))
+    print(sars_cov2_data_copy.head(10))
+
+  preds_sars_cov2_df = merge_on_state(
+    sars_cov2_data_copy, 
+    preds_df, 
+    how='left'
   )
-  India_statewise_statsFile = os_style_formatter(
-      f'{LOCAL_DATA_DIR}{POPUL_STATS_CSV_FILENAME_POINTER_STR}'
+
+  preds_sars_cov2_df = preds_sars_cov2_df.fillna(0)
+
+  if verbose:
+    print(preds_sars_cov2_df.head(10))
+
+  for column in ['ID', 'id', 'discharged']:
+    try:
+      del preds_sars_cov2_df[column]
+    except Exception as e:
+      e = getattr(e, 'message', repr(e))
+      if verbose:
+        print(f'Unable to delete dataframe item: {column} due to: {e} ...')
+
+  merged_preds_data  = sars_cov2_columns(
+    preds_sars_cov2_df, 
+    India_statewise
   )
-  saved_predsFile = os_style_formatter(
-      f'{LOCAL_DATA_DIR}{SARSCOV2_FORECASTS_FILENAME_POINTER_STR}'
-  ) 
 
-  if os.path.exists(India_GeoJSON_repoFile):
-    India_statewise = geopandas.read_file(India_GeoJSON_repoFile)  
-    print('Reading India GeoJSON file from saved repo ...')
+  return {
+    'preds_map_attributes': merged_preds_data['column_data'],
+    'preds_sars_cov2_data': merged_preds_data['data_frame'].fillna(0)
+  }
+
+def load_sars_cov2_datasets()->dict:
+  India_GeoJSON_repoFile = local_data_file(GEOJSON_FILENAME_POINTER_STR)
+  sars_cov2_statewise_repoFile = local_data_file(SARSCOV2_STATS_CSV_FILENAME_POINTER_STR)
+  India_statewise_statsFile = local_data_file(POPUL_STATS_CSV_FILENAME_POINTER_STR)
+  saved_predsFile = local_data_file(SARSCOV2_FORECASTS_FILENAME_POINTER_STR)
+
+  if India_GeoJSON_repoFile is not None:
+    India_geometry = compiled_geometry(India_GeoJSON_repoFile)
+    print('Reading India geometry compiled from the local GeoJSON cache ...')
   else:
     sys.exit('Failed to read GeoJSON file for India ...')
 
-  if os.path.exists(sars_cov2_statewise_repoFile):
-    sars_cov2_data = pd.read_csv(sars_cov2_statewise_repoFile)  
-    print('Reading India SARS-CoV2 file from saved repo ...')
+  if sars_cov2_statewise_repoFile is not None:
+    sars_cov2_data = pd.read_csv(sars_cov2_statewise_repoFile)
+    print('Reading India SARS-CoV2 file from local data cache ...')
   else:
     sys.exit('Failed to read India SARS-CoV2 file ...')
 
-  if os.path.exists(India_statewise_statsFile):
-    India_stats = pd.read_csv(India_statewise_statsFile)  
-    print('Reading India stats file from saved repo ...')
+  if India_statewise_statsFile is not None:
+    India_stats = pd.read_csv(India_statewise_statsFile)
+    print('Reading India stats file from local data cache ...')
   else:
     sys.exit('Failed to read India stats file ...')
 
-  if os.path.exists(saved_predsFile):
-    preds_df = pd.read_csv(saved_predsFile)
+  if saved_predsFile is not None:
+    preds_df = apply_corrections(pd.read_csv(saved_predsFile))
+    preds_df = preds_df[
+      ['state',                                                        \
+       'preds_cases_7', 'preds_cases_3', 'preds_cases',                \
+       'preds_cases_7_std', 'preds_cases_3_std', 'preds_cases_std',    \
+       'MAPE', 'MAPE_3', 'MAPE_7', 'state_id']
+    ]
   else:
     print('Advanced mode disabled ...')
-    advanced_mode=False
-
-sars_cov2_data.fillna(0)
+    preds_df = None
 
-preds_df = preds_df[
-  ['state',                                                        \
-   'preds_cases_7', 'preds_cases_3', 'preds_cases',                \
-   'preds_cases_7_std', 'preds_cases_3_std', 'preds_cases_std',    \
-   'MAPE', 'MAPE_3', 'MAPE_7']
-]
+  India_statewise = apply_corrections(India_geometry['properties'])
 
-preds_df.fillna(0)
+  if enable_GeoJSON_saving:
+    explode_geometry(
+      apply_corrections(read_projected_geometry(India_GeoJSON_repoFile))
+    ).to_file('India_statewise_minified.geojson', driver='GeoJSON')
 
-India_statewise = apply_corrections(India_statewise)
+  India_stats = apply_corrections(India_stats)
 
-def convert_multi_polygon_to_list(state, input_df):
-    polygon_arr = np.array(
-      input_df[input_df['state'] == state]['geometry']
-    )
-    return list(polygon_arr[0].geoms)
+  if len(sars_cov2_data.columns) == 6:
+    del sars_cov2_data['active_cases']
 
-def update_polygon_geojson_dataframe(state, input_df):
-    polygon_list = convert_multi_polygon_to_list(state, input_df)
-    print(f'Number of polygons from Multipolygon for: {state}: ', len(polygon_list))
-    for p_idx, polygon in enumerate(polygon_list):
-        if p_idx == 0:
-            input_df.loc[input_df['state'] == state,'geometry'] = polygon
-        else:
-            input_df.loc[len(input_df) + 1] = [state, polygon]
-    return input_df
+  sars_cov2_data = apply_corrections(sars_cov2_data)
 
-India_statewise = India_statewise.to_crs(
-   'EPSG:3857'
-  #'EPSG:3395'
-)
+  sars_cov2_data = merge_on_state(India_stats, sars_cov2_data, how='left')
+  sars_cov2_data = sars_cov2_data.fillna(0)
+  sars_cov2_data_copy = sars_cov2_data.copy()
 
-state = 'Puducherry'
-India_statewise = update_polygon_geojson_dataframe(state, India_statewise)
+  no_sars_cov2_list = list(set(list(India_statewise.state.values)) -set(list(sars_cov2_data.state)))
+  if verbose:
+    print('A total of: {} states with no reports of SARS-CoV2 ...'.format(len(no_sars_cov2_list)))
+    if len(no_sars_cov2_list)>=1:
+      print('\nStates in India with no SARS-CoV2 reports:')
+      for no_sars_cov2_state in no_sars_cov2_list:
+        print(f'\n{no_sars_cov2_state} ...')
 
-state = 'Andaman and Nicobar Islands'
-India_statewise = update_polygon_geojson_dataframe(state, India_statewise)
+  merged_data = sars_cov2_columns(
+    sars_cov2_data, 
+    India_statewise, 
+    verbose=verbose
+  )
 
-if enable_GeoJSON_saving:
-  India_statewise.to_file('India_statewise_minified.geojson', driver='GeoJSON')
+  datasets = {
+    'India_statewise': India_statewise,
+    'India_stats': India_stats,
+    'sars_cov2_data': sars_cov2_data,
+    'sars_cov2_data_copy': sars_cov2_data_copy,
+    'preds_df': preds_df,
+    'no_sars_cov2_list': no_sars_cov2_list,
+    'map_attributes': merged_data['column_data'],
+    'map_geometry_levels': India_geometry['levels'],
+    'map_markers': India_geometry['markers']
+  }
+
+  if preds_df is not None:
+    datasets.update(forecast_dataset(sars_cov2_data_copy, preds_df, India_statewise))
+
+  datasets['shared_map_attributes'] = merge_attribute_columns(
+    datasets['map_attributes'], 
+    datasets.get('preds_map_attributes', dict())
+  )
+  datasets['shared_marker_data'] = marker_source_data(datasets['shared_map_attributes'], datasets['map_markers'])
 
-India_stats = apply_corrections(India_stats)
+  return datasets
 
-if len(sars_cov2_data.columns) == 6:
-  del sars_cov2_data['active_cases']
+sars_cov2_datasets = None
 
-sars_cov2_data = apply_corrections(sars_cov2_data)
+def install_app_datasets(datasets:dict)->dict:
+  global sars_cov2_datasets, India_statewise, India_stats, sars_cov2_data, sars_cov2_data_copy, preds_df, \
+         map_attributes, map_geometry_levels, map_marker_data, advanced_mode, india_total_cases, india_total_deaths
 
-sars_cov2_data = pd.merge(India_stats, sars_cov2_data, on='state', how='left')
-sars_cov2_data = sars_cov2_data.fillna(0)
-sars_cov2_data_copy = sars_cov2_data.copy()
+  sars_cov2_datasets = datasets
+  India_statewise = sars_cov2_datasets['India_statewise']
+  India_stats = sars_cov2_datasets['India_stats']
+  sars_cov2_data = sars_cov2_datasets['sars_cov2_data']
+  sars_cov2_data_copy = sars_cov2_datasets['sars_cov2_data_copy']
+  preds_df = sars_cov2_datasets['preds_df']
+  map_attributes = sars_cov2_datasets['shared_map_attributes']
+  map_geometry_levels = sars_cov2_datasets['map_geometry_levels']
+  map_marker_data = sars_cov2_datasets['shared_marker_data']
 
-no_sars_cov2_list = list(set(list(India_statewise.state.values)) -set(list(sars_cov2_data.state)))
-if verbose:
-  print('A total of: {} states with no reports of SARS-CoV2 ...'.format(len(no_sars_cov2_list)))
-  if len(no_sars_cov2_list)>=1:
-    print('\nStates in India with no SARS-CoV2 reports:')
-    for no_sars_cov2_state in no_sars_cov2_list:
-      print(f'\n{no_sars_cov2_state} ...')
+  advanced_mode = preds_df is not None
 
-def sars_cov2_json(sars_cov2_df:'Pandas dataframe', geo_df:'Pandas dataframe', verbose:bool=False)->dict:
-    merged_df = pd.merge(geo_df, sars_cov2_df, on='state', how='left')
+  india_total_cases = sars_cov2_data['total_cases'].sum()
+  india_total_deaths = sars_cov2_data['deaths'].sum()
 
-    try:
-      merged_df = merged_df.fillna(0)
-    except Exception as e:
-      e = getattr(e, 'message', repr(e))
-      print(f'Failed removing NaN values in the merged dataframe due to: {e} ...')
-      merged_df.fillna({'total_cases': 0}, inplace=True)
-      merged_df.fillna({'deaths': 0}, inplace=True)
-      merged_df.fillna({'discharged': 0}, inplace=True)
-
-      if verbose:
-        print('Consider updating GeoPandas library ...')
-  
-    merged_json = json.loads(merged_df.to_json())
-    json_data = json.dumps(merged_json)
-    return {'json_data': json_data, 'data_frame': merged_df}
+  if verbose:
+    print(f'Total reported cases for {DATA_UPDATE_DATE}: {india_total_cases} ...')
+    print(f'Total reported deaths for {DATA_UPDATE_DATE}: {india_total_deaths} ...')
 
-merged_data = sars_cov2_json(
-  sars_cov2_data, 
-  India_statewise, 
-  verbose=verbose
-)
+  return sars_cov2_datasets
 
-merged_json = merged_data['json_data']
+def load_app_datasets()->dict:
+  datasets = shared_datasets.get('sars_cov2_datasets', load_sars_cov2_datasets)
+  if datasets is sars_cov2_datasets:
+    return sars_cov2_datasets
+  return install_app_datasets(datasets)
 
 def CustomPalette(palette_type:'Bokeh palette', enable_colorInverse:bool=True)->'Bokeh palette':
   if (palette_type.lower()=='OrRd'.lower()) or (palette_type.lower()=='reds'):
@@ -308,7 +387,7 @@ def simple_stats_hover_tool_formatter(font_pixel_size:int=12)->'HTML string':
 
 def regionwise_forecast_performance_hover_tool_formatter(font_pixel_size:int=12)->'HTML string':
   return f"""<div style='{css_formatter(font_pixel_size+1)}'>
-             Forecast performance for: <strong>@plot_index</strong> <br>
+             Forecast performance for: <strong>@date{{{MODEL_PERFORMANCE_DATE_FORMAT}}}</strong> <br>
              <div>
              <p style="color:black; margin:0px 0; margin-bottom: 0.15em; margin-top: 0.15em">Reported cases: <strong>@y_cases{HTML_INT_FORMATTER_STR}</strong></p>
              <p style="color:red; margin:0px 0; margin-bottom: 0.15em; margin-top: 0.15em">Forecast a day ago: <strong>@y_preds{HTML_INT_FORMATTER_STR} (±@y_std{HTML_INT_FORMATTER_STR})</strong></p> 
@@ -377,7 +456,8 @@ def geographic_overlay(
       hoverTool=None,
       mapOverlay=True,
       enableTapTool=False,
-      enableToolbar=True
+      enableToolbar=True,
+      geometryColumns=('xs', 'ys')
 ):
   if mapOverlay:
     wmts = WMTSTileSource(url="https://c.tile.openstreetmap.org/{Z}/{X}/{Y}.png")
@@ -391,8 +471,7 @@ def geographic_overlay(
   plt.axis.visible = False
 
   plt.patches(
-    'xs',
-    'ys', 
+    *geometryColumns,
     source = geosourceJson, 
     fill_color = {'field' : colorMode, 
                   'transform' : colorMapper},
@@ -418,71 +497,94 @@ def geographic_overlay(
   
   return plt
 
-def union_territory_correction(
-      plt,
-      state=None,
-      idx=None,  
-      input_df=None,
-      geosourceJson=None, 
-      colorBar=None,
-      colorMapper=None,
-      colorMode=None,
-      advanced_plotting=False,
-      verbose=False
-):
-
-  xx, yy = np.array(India_statewise[India_statewise['state'] == state]['geometry'])[idx].exterior.coords.xy
-
-  opt_list = []
-  for i in ['total_cases',   'deaths',                        \
-            'preds_cases',   'preds_cases_std',   'MAPE',     \
-            'preds_cases_3', 'preds_cases_3_std', 'MAPE_3',   \
-            'preds_cases_7', 'preds_cases_7_std', 'MAPE_7']:
-    try:
-      opt_val = input_df.loc[input_df['state']==state, i]
-      opt_list.append([opt_val if len(opt_val) == 1 else list(opt_val)[0]])
-    except Exception as e:
-      if verbose:
-        print(state, e, i)
-      opt_list.append([0])
-
-  if advanced_plotting:
-    source = ColumnDataSource(
-
-      data = dict(
-
-        x=[np.mean(xx)],
-        y=[np.mean(yy)],
-        state=[state],
-        total_cases=opt_list[0],
-        deaths=opt_list[1],
-        preds_cases=opt_list[2],
-        preds_cases_std=opt_list[3],
-        MAPE=opt_list[4],
-        preds_cases_3=opt_list[5],
-        preds_cases_3_std=opt_list[6],
-        MAPE_3=opt_list[7],
-        preds_cases_7=opt_list[8],
-        preds_cases_7_std=opt_list[9],
-        MAPE_7=opt_list[10]
-
-      )
-
-    )
-  else:
-    source = ColumnDataSource(
+def on_plot_event(plt, event, callback):
+  plt.on_event(event, callback)
+  if plt.document is not None:
+    plt.document.callbacks.subscribe(event.event_name, plt)
+
+def attach_geometry_lod(plots, geosourceJson, geometry_levels:tuple, geometry_lod_state:dict=None):
+  if geometry_lod_state is None:
+    geometry_lod_state = dict()
+
+  def update_geometry_level(plt):
+    renderer = next(r for r in plt.renderers if isinstance(getattr(r, 'glyph', None), Patches))
+    geometry_lod_state.setdefault(plt.id, 0)
+
+    def update_level(event):
+      spans = [
+        end - start for start, end in ((event.x0, event.x1), (event.y0, event.y1)) \
+          if (start is not None) and (end is not None)
+      ]
+      level = min(geometry_lod_level(min(spans) if spans else None), len(geometry_levels) - 1)
+      if level != geometry_lod_state[plt.id]:
+        geometry_lod_state[plt.id] = level
+        xs_column, ys_column = add_map_geometry(geosourceJson, level, geometry_levels)
+        for glyph in (renderer.glyph, renderer.selection_glyph, renderer.nonselection_glyph, renderer.hover_glyph):
+          if isinstance(glyph, Patches):
+            glyph.update(xs=xs_column, ys=ys_column)
+        if verbose:
+          print(f'Switched map geometry to level of detail: {level} ...')
+    return update_level
+
+  for plt in plots:
+    on_plot_event(plt, RangesUpdate, update_geometry_level(plt))
+
+  return plots
+
+def decimate_source(source, series_state:dict, points:int=SERIES_DECIMATION_POINTS, bounds:tuple=None)->bool:
+  series = series_state.get('series')
+  if series is None:
+    return False
+  x_range = series_state.get('x_range')
+  if bounds is None:
+    bounds = (x_range.start, x_range.end) if x_range is not None else (None, None)
+  window = series_window(series['x'], *bounds)
+  if window == series_state.get('window'):
+    return False
+  series_state['window'] = window
+  indices = decimation_indices(
+    series['x'], [series[column] for column in MODEL_PERFORMANCE_DECIMATION_COLUMNS], window, points
+  )
+  source.data.update(decimate_series(series, indices))
+  if verbose:
+    print(f'Decimated model performance series window: {window} to {len(indices)} points ...')
+  return True
 
-      data = dict(
+def attach_series_decimation(plt, source, series_state:dict, points:int=SERIES_DECIMATION_POINTS):
+  series_state['x_range'] = plt.x_range
+  series_state['source'] = source
 
-        x=[np.mean(xx)],
-        y=[np.mean(yy)],
-        state=[state],
-        total_cases=[input_df.loc[input_df['state']==state,'total_cases']],
-        deaths=[input_df.loc[input_df['state']==state,'deaths']]
+  def update_window(event):
+    decimate_source(source, series_state, points, (event.x0, event.x1))
 
-      )
+  on_plot_event(plt, RangesUpdate, update_window)
+  return plt
 
-    )
+def refresh_series_source(series_state:dict, series:dict)->bool:
+  source, old_series = series_state.get('source'), series_state.get('series')
+  series_state['series'] = series
+  if (source is None) or (old_series is None):
+    return False
+  patches = column_patches(old_series, series)
+  if patches == dict():
+    return False
+  if len(source.data['x']) == len(old_series['x']):
+    rows = stream_rows(old_series, series)
+    if rows is not None:
+      source.stream(rows)
+      series_state['window'] = None
+      return True
+    if patches is not None:
+      return patch_source(source, patches)
+  series_state['window'] = None
+  return decimate_source(source, series_state)
+
+def union_territory_markers(
+      plt,
+      markerSource=None,
+      colorMapper=None,
+      colorMode=None
+):
 
   if version_check:
     plot_circle = plt.scatter
@@ -494,7 +596,7 @@ def union_territory_correction(
     x='x', 
     y='y', 
     size=25, 
-    source=source,
+    source=markerSource,
     line_color='blue',
     line_width=0.25,  
     #color='blue',
@@ -517,6 +619,26 @@ def CustomTitleFormatter():
 
   return xtext, ytext, xbox, ybox
 
+def india_totals(input_df=None, advanced_plotting=False)->dict:
+  if advanced_plotting:
+    return dict(
+      total_cases=[sars_cov2_data['total_cases'].sum()],
+      deaths=[sars_cov2_data['deaths'].sum()],
+      preds_cases=[preds_df['preds_cases'].sum()],
+      preds_cases_std=[preds_df['preds_cases_std'].sum()],
+      MAPE=[preds_df['MAPE'].mean()],
+      preds_cases_3=[preds_df['preds_cases_3'].sum()],
+      preds_cases_3_std=[preds_df['preds_cases_3_std'].sum()],
+      MAPE_3=[preds_df['MAPE_3'].mean()],
+      preds_cases_7=[preds_df['preds_cases_7'].sum()],
+      preds_cases_7_std=[preds_df['preds_cases_7_std'].sum()],
+      MAPE_7=[np.mean(np.abs(preds_df['MAPE_7']))]
+    )
+  return dict(
+    total_cases=[input_df['total_cases'].sum()],
+    deaths=[input_df['deaths'].sum()]
+  )
+
 def CustomTitleOverlay(
       plt,  
       xtext=0,
@@ -540,41 +662,10 @@ def CustomTitleOverlay(
     
   plt.add_layout(overlay_text) 
 
-  if advanced_plotting:
-    print(sars_cov2_data['total_cases'].sum())  
-    
-    source = ColumnDataSource(
-
-      data = dict(
-
-        x=[xbox],
-        y=[ybox],
-        state=['India'],
-        total_cases=[sars_cov2_data['total_cases'].sum()],
-        deaths=[sars_cov2_data['deaths'].sum()],
-        preds_cases=[preds_df['preds_cases'].sum()],
-        preds_cases_std=[preds_df['preds_cases_std'].sum()],
-        MAPE=[preds_df['MAPE'].mean()],
-        preds_cases_3=[preds_df['preds_cases_3'].sum()],
-        preds_cases_3_std=[preds_df['preds_cases_3_std'].sum()],
-        MAPE_3=[preds_df['MAPE_3'].mean()],
-        preds_cases_7=[preds_df['preds_cases_7'].sum()],
-        preds_cases_7_std=[preds_df['preds_cases_7_std'].sum()],
-        MAPE_7=[np.mean(np.abs(preds_df['MAPE_7']))]
-
-      )
-
-    )
-  else:
-    source = ColumnDataSource(
-        data = dict(
-                x=[xbox],
-                y=[ybox],
-                state=['India'],
-                total_cases=[input_df['total_cases'].sum()],
-                deaths=[input_df['deaths'].sum()]
-              )
-    )
+  source = ColumnDataSource(
+    data=dict(x=[xbox], y=[ybox], state=['India'], **india_totals(input_df, advanced_plotting)),
+    name=INDIA_TOTALS_SOURCE_NAME
+  )
 
   plt.rect(
     x='x', 
@@ -592,6 +683,11 @@ def CustomTitleOverlay(
   
   return plt
 
+def color_mapper_high(values, enable_performance_stats=False)->float:
+  if enable_performance_stats:
+    return np.round((np.max(values)),3)
+  return int(10*(np.ceil(np.max(values)/10)))
+
 def sars_cov2_plot(
       sars_cov2_geosource,
       input_df=None,
@@ -607,7 +703,10 @@ def sars_cov2_plot(
       enable_advanced_stats=False,
       enable_performance_stats=False,
       enable_foecast_perf=False,
-      enable_toolbar=False
+      enable_toolbar=False,
+      geometry_levels=None,
+      marker_source=None,
+      geometry_columns=('xs', 'ys')
 ):
   
   palette = CustomPalette(
@@ -617,8 +716,8 @@ def sars_cov2_plot(
   color_mapper = LinearColorMapper(
       palette=palette, 
       low=0, 
-      high=int(10*(np.ceil(np.max(input_df[color_field].values)/10))) \
-          if not enable_performance_stats else np.round((np.max(input_df[color_field].values)),3)
+      high=color_mapper_high(input_df[color_field].values, enable_performance_stats),
+      tags=[color_field, enable_performance_stats]
   )
 
   if integer_plot:
@@ -647,11 +746,17 @@ def sars_cov2_plot(
     enable_performance_stats
   )
 
+  enable_geometry_lod = map_overlay and (geometry_levels is not None) and (len(geometry_levels) > 1)
+
+  plot_tools = ['save'] if enable_toolbar else []
+  if enable_geometry_lod:
+    plot_tools = ['pan', 'wheel_zoom', 'reset'] + plot_tools
+
   plt = figure(
     title=plot_title,
     x_range=(xmin, xmax) if map_overlay else None,
     y_range=(ymin, ymax) if map_overlay else None,
-    tools='save' if enable_toolbar else '', 
+    tools=','.join(plot_tools), 
     outer_height = 512, outer_width = 512,
     toolbar_location = 'left' if enable_toolbar else None,
     lod_factor=int(1e7),
@@ -668,97 +773,19 @@ def sars_cov2_plot(
     hoverTool=hover,
     mapOverlay=map_overlay,
     enableToolbar=enable_toolbar,
-    enableTapTool=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
+    enableTapTool=True if ((enable_advanced_stats) or (enable_performance_stats)) else False,
+    geometryColumns=geometry_columns
   )
-  
-  if enable_union_territory_stats:
-    for i in range(8):
-      plt = union_territory_correction(
-        plt,
-        state='Andaman and Nicobar Islands',
-        idx=i,
-        input_df=input_df,
-        geosourceJson=sars_cov2_geosource,
-        colorBar=color_bar, 
-        colorMapper=color_mapper, 
-        colorMode=input_field,
-        advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-      )  
-
-    plt = union_territory_correction(
-      plt,
-      state='Chandigarh',
-      idx=0,
-      input_df=input_df,
-      geosourceJson=sars_cov2_geosource,
-      colorBar=color_bar, 
-      colorMapper=color_mapper, 
-      colorMode=input_field,
-      advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-    )
-
-    for i in range(2):  
-      plt = union_territory_correction(
-        plt,
-        state='Dadra and Nagar Haveli and Daman and Diu',
-        idx=i,
-        input_df=input_df,
-        geosourceJson=sars_cov2_geosource,
-        colorBar=color_bar, 
-        colorMapper=color_mapper, 
-        colorMode=input_field,
-        advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-      )
-
-    plt = union_territory_correction(
-      plt,
-      state='Delhi',
-      idx=0,
-      input_df=input_df,
-      geosourceJson=sars_cov2_geosource,
-      colorBar=color_bar, 
-      colorMapper=color_mapper, 
-      colorMode=input_field,
-      advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-    )
 
-    plt = union_territory_correction(
-      plt,
-      state='Chandigarh',
-      idx=0,
-      input_df=input_df,
-      geosourceJson=sars_cov2_geosource,
-      colorBar=color_bar, 
-      colorMapper=color_mapper, 
-      colorMode=input_field,
-      advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-    )
-
-    plt = union_territory_correction(
+  if enable_union_territory_stats:
+    plt = union_territory_markers(
       plt,
-      state='Lakshadweep',
-      idx=0,
-      input_df=input_df,
-      geosourceJson=sars_cov2_geosource,
-      colorBar=color_bar, 
+      markerSource=marker_source if marker_source is not None else \
+                     ColumnDataSource(data=dict(map_marker_data)),
       colorMapper=color_mapper, 
-      colorMode=input_field,
-      advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
+      colorMode=input_field
     )
 
-    for i in range(2):
-      plt = union_territory_correction(
-        plt,
-        state='Puducherry',
-        idx=i,
-        input_df=input_df,
-        geosourceJson=sars_cov2_geosource,
-        colorBar=color_bar, 
-        colorMapper=color_mapper, 
-        colorMode=input_field,
-        advanced_plotting=True if ((enable_advanced_stats) or (enable_performance_stats)) else False
-      )
-
   if enable_India_stats:
     xtext, ytext, xbox, ybox = CustomTitleFormatter()
 
@@ -788,146 +815,103 @@ def sars_cov2_plot(
 
   return plt
 
-advanced_mode = True
-
-sars_cov2_geosource = GeoJSONDataSource(geojson=merged_json)
-sars_cov2_geosource = np.nan_to_num(sars_cov2_geosource, nan=0, posinf=0, neginf=0)
 plot_title = None
 app_title = 'India SARS-CoV2 statewise statistics'
+MAP_TAB_TITLES = ('⌂', 'Forecast', 'Forecast quality')
+TAB_PLACEHOLDER_NAME = 'sars_cov2_tab_placeholder'
 
-india_total_cases = sars_cov2_data['total_cases'].sum()
-india_total_deaths = sars_cov2_data['deaths'].sum()
-
-if verbose:
-  print(f'Total reported cases for {DATA_UPDATE_DATE}: {india_total_cases} ...')
-  print(f'Total reported deaths for {DATA_UPDATE_DATE}: {india_total_deaths} ...')
-
-def create_visualization_tabs(advanced_mode=True):
-  tabs = []
-  basic_sars_cov2_plot = sars_cov2_plot(
-    sars_cov2_geosource, 
-    input_df=sars_cov2_data,
-    input_field='total_cases',
-    color_field='total_cases',
-    enable_India_stats=True,
-    integer_plot=True,
-    plot_title=plot_title
-  )
-
-  basic_plot_tab = Tab_Panel(
-    child=basic_sars_cov2_plot, 
-    title='⌂'
+def create_map_sources(geometry_lod=False)->tuple:
+  shared_geosource = ColumnDataSource(
+    data=dict(map_attributes) if geometry_lod else map_source_data(map_attributes, map_geometry_levels[-1])
   )
-
-  tabs.append(basic_plot_tab)
-
-  if advanced_mode:
-    preds_df.columns = ['state',                                                        \
-                        'preds_cases_7', 'preds_cases_3', 'preds_cases',                \
-                        'preds_cases_7_std', 'preds_cases_3_std', 'preds_cases_std',    \
-                        'MAPE', 'MAPE_3', 'MAPE_7']
-
-    if verbose:
-      print(preds_df.head(10))
-      print(sars_cov2_data_copy.head(10))
-
-    preds_sars_cov2_df = pd.merge(
-      sars_cov2_data_copy, 
-      preds_df, 
-      on='state', 
-      how='left'
-    )
-
-    preds_sars_cov2_df = preds_sars_cov2_df.fillna(0)
-
-    if verbose:
-      print(preds_sars_cov2_df.head(10))
-    
-    try:
-      del preds_sars_cov2_df['ID']
-    except Exception as e:
-      e = getattr(e, 'message', repr(e))
-      if verbose:
-        print(f'Unable to delete dataframe item: ID due to: {e} ...')
-
-    try:
-      del preds_sars_cov2_df['id']
-    except Exception as e:
-      e = getattr(e, 'message', repr(e))
-      if verbose:
-        print(f'Unable to delete dataframe item: id due to: {e} ...')
-
-    try:
-      del preds_sars_cov2_df['discharged']
-    except Exception as e:
-      e = getattr(e, 'message', repr(e))
-      if verbose:
-        print(f'Unable to delete dataframe item: discharged due to: {e} ...')
-
-    merged_preds_data  = sars_cov2_json(
-      preds_sars_cov2_df, 
-      India_statewise
+  shared_marker_source = ColumnDataSource(data=dict(map_marker_data))
+  return shared_geosource, shared_marker_source
+
+def map_geometry_columns(level:int)->tuple:
+  return (f'xs_L{level}', f'ys_L{level}')
+
+def add_map_geometry(geosource, level:int, geometry_levels:tuple)->tuple:
+  xs_column, ys_column = map_geometry_columns(level)
+  if xs_column not in geosource.data:
+    geosource.data.update({
+      xs_column: list(geometry_levels[level]['xs']), 
+      ys_column: list(geometry_levels[level]['ys'])
+    })
+  return xs_column, ys_column
+
+def create_map_plot(map_tab:int, geosource, marker_source, geometry_levels=None):
+  geometry_columns = ('xs', 'ys') if geometry_levels is None else \
+                     add_map_geometry(geosource, 0, geometry_levels)
+  if map_tab == 0:
+    return sars_cov2_plot(
+      geosource, 
+      input_df=sars_cov2_data,
+      input_field='total_cases',
+      color_field='total_cases',
+      enable_India_stats=True,
+      integer_plot=True,
+      plot_title=plot_title,
+      geometry_levels=geometry_levels,
+      marker_source=marker_source,
+      geometry_columns=geometry_columns
     )
 
-    merged_preds_json  = merged_preds_data['json_data']
-    preds_sars_cov2_data = merged_preds_data['data_frame']
-
-    if verbose:
-      print(preds_sars_cov2_data['state'].equals(sars_cov2_data['state']))
-      print(set(list(preds_sars_cov2_data['state'])) - set(list(sars_cov2_data['state'])))
+  preds_sars_cov2_data = sars_cov2_datasets['preds_sars_cov2_data']
 
-    preds_sars_cov2_geosource = GeoJSONDataSource(geojson=merged_preds_json)
+  if verbose:
+    print(preds_sars_cov2_data['state'].equals(sars_cov2_data['state']))
+    print(set(list(preds_sars_cov2_data['state'])) - set(list(sars_cov2_data['state'])))
 
-    preds_sars_cov2_geosource= np.nan_to_num(
-      preds_sars_cov2_geosource, 
-      nan=0, 
-      posinf=0, 
-      neginf=0
-    )
-
-    preds_sars_cov2_data = preds_sars_cov2_data.fillna(0)
-
-    advanced_sars_cov2_plot = sars_cov2_plot(
-      preds_sars_cov2_geosource, 
+  if map_tab == 1:
+    return sars_cov2_plot(
+      geosource, 
       input_df=preds_sars_cov2_data,
       input_field='preds_cases_7',
       color_field='total_cases',
       enable_India_stats=True,
       enable_advanced_stats=True,
       integer_plot=True,
-      plot_title=None
-    )
-
-    advanced_plot_tab = Tab_Panel(
-      child=advanced_sars_cov2_plot, 
-      title='Forecast'
+      plot_title=None,
+      geometry_levels=geometry_levels,
+      marker_source=marker_source,
+      geometry_columns=geometry_columns
     )
 
-    tabs.append(advanced_plot_tab)
+  return sars_cov2_plot(
+    geosource, 
+    input_df=preds_sars_cov2_data,
+    palette_type='Greens',
+    input_field='MAPE_7',
+    color_field='MAPE_7',
+    enable_India_stats=True,
+    enable_performance_stats=True,
+    plot_title=None,
+    geometry_levels=geometry_levels,
+    marker_source=marker_source,
+    geometry_columns=geometry_columns
+  )
 
-    performance_sars_cov2_plot = sars_cov2_plot(
-      preds_sars_cov2_geosource, 
-      input_df=preds_sars_cov2_data,
-      palette_type='Greens',
-      input_field='MAPE_7',
-      color_field='MAPE_7',
-      enable_India_stats=True,
-      enable_performance_stats=True,
-      plot_title=None
-    )
+def create_visualization_tabs(advanced_mode=True, geometry_lod=False):
+  shared_geosource, shared_marker_source = create_map_sources(geometry_lod)
+  shared_geometry_levels = map_geometry_levels if geometry_lod else None
 
-    performance_plot_tab = Tab_Panel(
-      child=performance_sars_cov2_plot, 
-      title='Forecast quality'
-    )
+  tabs = [
+    Tab_Panel(
+      child=create_map_plot(map_tab, shared_geosource, shared_marker_source, shared_geometry_levels), 
+      title=MAP_TAB_TITLES[map_tab]
+    ) for map_tab in range(len(MAP_TAB_TITLES) if advanced_mode else 1)
+  ]
 
-    tabs.append(performance_plot_tab)
+  if geometry_lod:
+    attach_geometry_lod([tab.child for tab in tabs], shared_geosource, shared_geometry_levels)
 
   return tabs
 
 def LineSmoothing(
       x, y, interpolationType='cubic', interpolationPoints=1000
 ):
+  from scipy.interpolate import interp1d
+
   fn = interp1d(
     x, y, kind=interpolationType
   )
@@ -940,127 +924,81 @@ def LineSmoothing(
 
   return x_lns, y_lns
 
+def date_tick_formatter(source)->'Bokeh tick formatter':
+  return CustomJSTickFormatter(
+    args={'source': source},
+    code="""
+      const dates = source.data['date']
+      const xs = source.data['x']
+      if (!Number.isInteger(tick) || dates == null || dates.length == 0)
+        return `${tick}`
+      let lo = 0, hi = xs.length - 1
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1
+        if (xs[mid] < tick) lo = mid + 1
+        else hi = mid
+      }
+      const day = 86400000
+      let time = null
+      if (xs[lo] == tick)
+        time = dates[lo]
+      else if (lo > 0 && xs[lo - 1] < tick && tick < xs[lo] && dates[lo] - dates[lo - 1] == (xs[lo] - xs[lo - 1])*day)
+        time = dates[lo - 1] + (tick - xs[lo - 1])*day
+      if (time == null)
+        return ''
+      const months = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                      'August', 'September', 'October', 'November', 'December']
+      const date = new Date(time)
+      return `${String(date.getUTCDate()).padStart(2, '0')}-${months[date.getUTCMonth()]}-${date.getUTCFullYear()}`
+    """
+  )
+
+def band_limit(source, preds_column:str, std_column:str, sign:int, sigma:float=MODEL_PERFORMANCE_BAND_SIGMA):
+  return transform(preds_column, CustomJSTransform(
+    args={'source': source, 'std_column': std_column, 'sign': sign, 'sigma': sigma},
+    v_func="""
+      const std = source.data[std_column]
+      const limits = new Float64Array(xs.length)
+      for (let i = 0; i < xs.length; i++)
+        limits[i] = xs[i] + sign*sigma*std[i]
+      return limits
+    """
+  ))
+
 def model_performance_plot(
       source,
       use_cds=False,
       enable_interpolation=False, 
+      enable_series_decimation=False,
+      band_sigma=MODEL_PERFORMANCE_BAND_SIGMA,
       regionwise_forecast_perf_hover_tool=True
 ):
-    if use_cds:
-      plotIndex = source.data['plot_index']
-      plotIndex_labels = source.data['plot_labels']
-      dateLabels = {i: date for i, date in enumerate(plotIndex_labels)}
-      x=source.data['x']
-    else:
-      plotIndex_labels  = list(source['date'].astype('str'))  
-      model_performance = source.fillna(0)  
-      x = [i for i in range(len(list(source['date'].astype('str'))))]
-
-      y_cases  = list(source['total_cases'].astype('int'))
-      y_preds  = list(source['preds_cases'].astype('int'))
-      y_preds3 = list(source['preds_cases_3'].astype('int'))
-      y_preds7 = list(source['preds_cases_7'].astype('int'))
-
-      y_stdev   = list(source['preds_cases_std'].astype('int'))
-      y_3_stdev = list(source['preds_cases_3_std'].astype('int'))
-      y_7_stdev = list(source['preds_cases_7_std'].astype('int'))
-
-      lower_lim   = list(np.asarray(y_preds)-3*np.asarray(y_stdev))
-      lower_3_lim = list(np.asarray(y_preds3)-3*np.asarray(y_3_stdev))
-      lower_7_lim = list(np.asarray(y_preds7)-3*np.asarray(y_7_stdev))
-
-      upper_lim   = list(np.asarray(y_preds)+3*np.asarray(y_stdev))
-      upper_3_lim = list(np.asarray(y_preds3)+3*np.asarray(y_3_stdev))
-      upper_7_lim = list(np.asarray(y_preds7)+3*np.asarray(y_7_stdev))
-
-      plotIndex   = list(source['date'].astype('str'))
-      dateLabels  = {i: date for i, date in enumerate(plotIndex)}
-
-      source = ColumnDataSource(
-        {
-          'x':x,
-          'plot_index':plotIndex,
-          'plot_labels':plotIndex_labels, 
-          'y_cases':y_cases,
-          'y_preds':y_preds,
-          'y_preds3':y_preds3,
-          'y_preds7':y_preds7,
-          'y_std':y_stdev,
-          'y_3std':y_3_stdev,
-          'y_7std':y_7_stdev,
-          'upper_lim':upper_lim,
-          'upper_3_lim':upper_3_lim,
-          'upper_7_lim':upper_7_lim,
-          'lower_lim':lower_lim,
-          'lower_3_lim':lower_3_lim,
-          'lower_7_lim':lower_7_lim
-        }
-      )
+    if not use_cds:
+      source = ColumnDataSource(model_performance_series(source))
+
+    x = source.data['x']
     
     if enable_interpolation:
-      x_cases_interpol,y_cases_interpol   = LineSmoothing(x,y_cases)
-      x_preds_interpol,y_preds_interpol   = LineSmoothing(x,y_preds)
-      x_preds3_interpol,y_preds3_interpol = LineSmoothing(x,y_preds3) 
-      x_preds7_interpol,y_preds7_interpol = LineSmoothing(x,y_preds7)
-
-    if len(plotIndex)%2==0 or len(plotIndex)%5==0 or np.round((len(plotIndex)/10)/(len(plotIndex)//10))==1:
-      for i in range(
-                  len(plotIndex)//2
-                    ):
-        dateLabelObject = datetime.strptime(
-          str(dateLabels[len(plotIndex)-1]),
-          '%d-%B-%Y'
-        )
-
-        dateLabel_extra = dateLabelObject + timedelta(days=(i + 1))
-
-        dateLabels.update(
-          {len(plotIndex) + i : str(dateLabel_extra.strftime('%d-%B-%Y')) }
-        )
-
-    data_cases = dict(
-      title=['report' for i in range(len(x))],
-      plotIndex=plotIndex,
-      x='x',
-      y='y_cases',
-      source=source
-    )
-
-    data_preds = dict(
-      title=['forecast a day before' for i in range(len(x))],
-      plotIndex='plot_index',
-      x='x',
-      y='y_preds',
-      source=source
-    )
-
-    data_preds3 = dict(
-      title=['forecast 3 days before' for i in range(len(x))],
-      plotIndex='plot_index',
-      x='x',
-      y='y_preds3',
-      source=source
-    )
-
-    data_preds7 = dict(
-      title=['forecast 7 days before' for i in range(len(x))],
-      plotIndex='plot_index',
-      x='x',
-      y='y_preds7',
-      source=source
-    )
+      x_cases_interpol,y_cases_interpol   = LineSmoothing(x,source.data['y_cases'])
+      x_preds_interpol,y_preds_interpol   = LineSmoothing(x,source.data['y_preds'])
+      x_preds3_interpol,y_preds3_interpol = LineSmoothing(x,source.data['y_preds3']) 
+      x_preds7_interpol,y_preds7_interpol = LineSmoothing(x,source.data['y_preds7'])
 
     TOOLTIPS = regionwise_forecast_performance_hover_tool_formatter(
       font_pixel_size=12
     ) if regionwise_forecast_perf_hover_tool \
-      else [('Date: ','@plot_index'), ('Cases: ','@y_cases')]
+      else [('Date: ',f'@date{{{MODEL_PERFORMANCE_DATE_FORMAT}}}'), ('Cases: ','@y_cases')]
+
+    plot_tools = ['hover']
+    if enable_series_decimation:
+      plot_tools = ['xpan', 'xwheel_zoom', 'reset'] + plot_tools
 
     perf_plot = figure(
       #y_axis_type="log",y_range=(2.5e4,7.5e4), 
       y_axis_location='left',
       outer_height=500, 
       outer_width=500,
-      tools='hover', 
+      tools=','.join(plot_tools), 
       toolbar_location=None,
       tooltips=TOOLTIPS
     )
@@ -1136,11 +1074,15 @@ def model_performance_plot(
     )
 
     perf_plot.hover.renderers = [r, r1, r3, r7]
+    perf_plot.hover.formatters = {'@date': 'datetime'}
+
+    if enable_series_decimation:
+      perf_plot.toolbar.active_scroll = perf_plot.select_one({'type': WheelZoomTool})
     
     perf_plot.yaxis.formatter.use_scientific = False
     perf_plot.yaxis.formatter = NumeralTickFormatter(format='0,0')
     
-    perf_plot.xaxis.major_label_overrides = dateLabels
+    perf_plot.xaxis.formatter = date_tick_formatter(source)
     perf_plot.xaxis.axis_label = 'Date'
     perf_plot.yaxis.axis_label = ' '
     perf_plot.yaxis.axis_label_text_align = 'left'
@@ -1170,8 +1112,8 @@ def model_performance_plot(
 
     band = Band(
       base='x',
-      lower='lower_lim',
-      upper='upper_lim',
+      lower=band_limit(source, 'y_preds', 'y_std', -1, band_sigma),
+      upper=band_limit(source, 'y_preds', 'y_std', 1, band_sigma),
       source=source, 
       level='underlay',
       fill_alpha=0.5,
@@ -1182,8 +1124,8 @@ def model_performance_plot(
   
     band3 = Band(
       base='x',
-      lower='lower_3_lim',
-      upper='upper_3_lim',
+      lower=band_limit(source, 'y_preds3', 'y_3std', -1, band_sigma),
+      upper=band_limit(source, 'y_preds3', 'y_3std', 1, band_sigma),
       source=source, 
       level='underlay',
       fill_alpha=0.4,
@@ -1194,8 +1136,8 @@ def model_performance_plot(
   
     band7 = Band(
       base='x',
-      lower='lower_7_lim',
-      upper='upper_7_lim',
+      lower=band_limit(source, 'y_preds7', 'y_7std', -1, band_sigma),
+      upper=band_limit(source, 'y_preds7', 'y_7std', 1, band_sigma),
       source=source, 
       level='underlay',
       fill_alpha=0.25,
@@ -1210,89 +1152,224 @@ def model_performance_plot(
 
     return perf_plot
 
-def date_formatter(x):
-  datetimeobject = datetime.strptime(str(x),'%Y%m%d')
+def parse_dates(values)->'Numpy array':
+  values = np.asarray(values)
+  if np.issubdtype(values.dtype, np.datetime64):
+    return values.astype('datetime64[D]')
+  stamps = values.astype(np.int64)
+  years, months, days = stamps//10000, stamps//100%100, stamps%100
+  return (years - 1970).astype('datetime64[Y]').astype('datetime64[M]') + \
+         (months - 1).astype('timedelta64[M]') + \
+         (days - 1).astype('timedelta64[D]')
+
+def model_performance_series(model_performance:'Pandas dataframe')->dict:
+  series = {
+    'x': np.arange(len(model_performance), dtype=np.int32),
+    'date': parse_dates(model_performance['date'].to_numpy())
+  }
+  column_idx = model_performance.columns.get_indexer(list(MODEL_PERFORMANCE_COLUMNS.values()))
+  if (column_idx < 0).any():
+    missing = [column for column, idx in zip(MODEL_PERFORMANCE_COLUMNS.values(), column_idx) if idx < 0]
+    raise KeyError(f'Missing model performance columns: {missing} ...')
+  values = model_performance.to_numpy()[:, column_idx].T
+  if values.dtype.kind == 'f':
+    values = np.nan_to_num(values)
+  values = np.ascontiguousarray(values, dtype=np.int32)
+  for column, column_values in zip(MODEL_PERFORMANCE_COLUMNS, values):
+    series[column] = column_values
+  return series
+
+def model_performance_pointer(state:str)->str:
+  return f'{PERF_FILENAME_POINTER_STR}{state}.csv'
+
+def prefetch_model_performance(states, max_workers:int=8)->tuple:
+  pointers = {state: model_performance_pointer(state) for state in dict.fromkeys(states)}
+  frames, latencies = prefetch_assets(
+    pointers.values(),
+    DATA_URL,
+    local_dirs=[os_style_formatter(LOCAL_DATA_DIR), os_style_formatter(ALT_LOCAL_DATA_DIR)],
+    reader=pd.read_csv,
+    max_workers=max_workers
+  )
+  model_performance_frames = {state: frames[pointer] for state, pointer in pointers.items()}
+  model_performance_latency = {state: latencies[pointer] for state, pointer in pointers.items()}
+  if verbose:
+    for state, latency in sorted(model_performance_latency.items(), key=lambda x: -(x[1] or 0)):
+      print(f'Model performance for: {state} loaded in: {latency if latency is None else round(latency, 4)} seconds ...')
+  loaded_latency = [latency for latency in model_performance_latency.values() if latency is not None]
+  if loaded_latency:
+    print(f'Prefetched model performance for: {len(loaded_latency)} regions, slowest file: {max(loaded_latency):.3f} seconds ...')
+  return model_performance_frames, model_performance_latency
+
+def read_model_performance_frame(state:str)->'Pandas dataframe':
+  MODEL_PERF_DATA_FILE = local_data_file(model_performance_pointer(state))
+  if MODEL_PERF_DATA_FILE is not None:
+    print(f'Reading model performance for: {state} from local data cache ...')
+    return pd.read_csv(MODEL_PERF_DATA_FILE)
+  sys.exit('No statewise model performance file found ...')
+
+def empty_model_performance_series()->dict:
+  series = {'x': np.zeros(0, dtype=np.int32), 'date': np.zeros(0, dtype='datetime64[D]')}
+  series.update({column: np.zeros(0, dtype=np.int32) for column in MODEL_PERFORMANCE_COLUMNS})
+  return series
+
+def model_performance_frame(region:str)->'Pandas dataframe':
+  return shared_datasets.get(
+    ('model_performance_frame', region), 
+    lambda: read_model_performance_frame(region)
+  )
 
-  return datetimeobject.strftime('%d-%B-%Y')
+def make_dataset_arrays(state, model_performance=None)->dict:
+  if model_performance is None:
+    model_performance = read_model_performance_frame(state)
+  return model_performance_series(model_performance)
+
+def make_dataset(state, model_performance=None):
+  return ColumnDataSource(dict(make_dataset_arrays(state, model_performance)))
+
+def load_region_datasets(regions)->dict:
+  model_performance_frames, _ = prefetch_model_performance(regions)
+  return {
+    region: make_dataset_arrays(region, model_performance) \
+      for region, model_performance in model_performance_frames.items() if model_performance is not None
+  }
+
+def model_performance_regions()->list:
+  if preds_df is None:
+    return []
+  return sorted(set(preds_df['state'])) + ['India']
+
+def build_region_generation()->'DatasetGeneration or None':
+  input_files = {
+    region: local_data_file(model_performance_pointer(region)) for region in model_performance_regions()
+  }
+  input_files = {region: file_path for region, file_path in input_files.items() if file_path is not None}
+  if not input_files:
+    return None
+  try:
+    return open_generation(
+      generation_key(input_files, params={'dataset': 'region_series', 'version': MODEL_PERFORMANCE_SERIES_VERSION}),
+      lambda: {'regions': load_region_datasets(list(input_files))}
+    )
+  except Exception as e:
+    e = getattr(e, 'message', repr(e))
+    print(f'Failed building shared region generation due to: {e}, reading regions per process ...')
+    return None
 
-def make_dataset(state):
-  MODEL_PERF_DATA_SOURCE = f'{DATA_URL}{PERF_FILENAME_POINTER_STR}'
-  MODEL_PERF_DATA_URL = '{}{}.csv'.format(MODEL_PERF_DATA_SOURCE, state)
-  MODEL_PERF_DATA_URL = MODEL_PERF_DATA_URL.replace(' ', '%20')
-  MODEL_PERF_DATA_FILE = os_style_formatter(
-    f'{LOCAL_DATA_DIR}{PERF_FILENAME_POINTER_STR}{state}.csv'
-  )
+def region_generation()->'DatasetGeneration or None':
+  return shared_datasets.get('region_generation', build_region_generation)
 
+def load_region_records(regions)->dict:
+  records = dict()
   try:
-    model_performance = pd.read_csv(MODEL_PERF_DATA_URL)
-    print(f'Reading model performance for: {state} from URL ...')
+    generation = region_generation()
+    if generation is not None:
+      records = {region: generation.record('regions', region) for region in regions}
   except Exception as e:
     e = getattr(e, 'message', repr(e))
-    print(f'Failed to read model performance data from URL due to: {e} ...')
-    if os.path.exists(MODEL_PERF_DATA_FILE):
-      model_performance = pd.read_csv(MODEL_PERF_DATA_FILE)  
-      print(f'Reading model performance for: {state} from saved repo file: {MODEL_PERF_DATA_FILE} ...')
-    else:
-      sys.exit('No statewise model performance file found ...')
+    print(f'Failed reading shared region generation due to: {e} ...')
+  missing = [region for region in regions if records.get(region) is None]
+  if missing:
+    records.update(load_region_datasets(missing))
+  return {region: record for region, record in records.items() if record is not None}
+
+def region_dataset(region:str, count:bool=True)->dict:
+  return region_datasets.get(
+    region, 
+    lambda: load_region_records([region]).get(region) or make_dataset_arrays(region), 
+    count=count
+  )
 
-  model_performance['date'] = model_performance['date'].apply(lambda x: date_formatter(x))  
-  plotIndex_labels = list(model_performance['date'].astype('str'))
-  
-  model_performance = model_performance.fillna(0)
-  plotIndex = list(model_performance['date'].astype('str'))   
-    
-  x=[i for i in range(len(list(model_performance['date'].astype('str'))))]
-
-  y_cases = list(model_performance['total_cases'].astype('int'))
-
-  y_preds  = list(model_performance['preds_cases'].astype('int'))
-  y_preds3 = list(model_performance['preds_cases_3'].astype('int'))
-  y_preds7 = list(model_performance['preds_cases_7'].astype('int'))
-
-  y_std  = list(model_performance['preds_cases_std'].astype('int'))
-  y_3std = list(model_performance['preds_cases_3_std'].astype('int'))
-  y_7std = list(model_performance['preds_cases_7_std'].astype('int'))
-      
-  lower_lim   = list(np.asarray(y_preds)-3*np.asarray(y_std))
-  lower_3_lim = list(np.asarray(y_preds3)-3*np.asarray(y_3std))
-  lower_7_lim = list(np.asarray(y_preds7)-3*np.asarray(y_7std))
-
-  upper_lim   = list(np.asarray(y_preds)+3*np.asarray(y_std))
-  upper_3_lim = list(np.asarray(y_preds3)+3*np.asarray(y_3std))
-  upper_7_lim = list(np.asarray(y_preds7)+3*np.asarray(y_7std))
-
-  return ColumnDataSource(
-    {
-      'x':x, 
-      'y_cases':y_cases, 
-      'plot_index': plotIndex, 
-      'plot_labels':plotIndex_labels, 
-      'y_preds':y_preds, 
-      'y_preds3':y_preds3, 
-      'y_preds7':y_preds7,
-      'y_std':y_std, 
-      'y_3std':y_3std,
-      'y_7std':y_7std,
-      'upper_lim':upper_lim,
-      'upper_3_lim':upper_3_lim,
-      'upper_7_lim':upper_7_lim,
-      'lower_lim':lower_lim,
-      'lower_3_lim':lower_3_lim,
-      'lower_7_lim':lower_7_lim
-    }
+def build_packed_region_series(generation=None)->dict:
+  columns = None
+  if generation is not None:
+    try:
+      meta = generation.groups['regions']
+      names, aliases = meta['names'], meta['aliases']
+      offsets = generation.array('regions', 'offsets')
+      columns = {column: generation.array('regions', aliases.get(column, column)) for column in meta['columns']}
+    except Exception as e:
+      e = getattr(e, 'message', repr(e))
+      print(f'Failed reading shared region generation due to: {e}, packing regions from local data cache ...')
+  if columns is None:
+    arrays, meta = pack_records(load_region_datasets(model_performance_regions()))
+    names, offsets = meta['names'], arrays['offsets']
+    columns = {column: arrays[meta['aliases'].get(column, column)] for column in meta['columns']}
+
+  data = {column: np.ascontiguousarray(columns[column], dtype=np.int32) for column in MODEL_PERFORMANCE_COLUMNS}
+  data['date'] = columns['date'].astype('datetime64[D]').astype(np.int32)
+  return {
+    'data': data,
+    'offsets': {name: [int(offsets[idx]), int(offsets[idx + 1])] for idx, name in enumerate(names)}
+  }
+
+def packed_region_series()->dict:
+  generation = region_generation()
+  return shared_datasets.get(
+    ('packed_region_series', generation.key if generation is not None else None),
+    lambda: build_packed_region_series(generation)
   )
 
+def packed_region_slice(packed:dict, region:str)->dict:
+  start, end = packed['offsets'][region]
+  series = {
+    'x': np.arange(end - start, dtype=np.int32),
+    'date': packed['data']['date'][start:end].astype('datetime64[D]')
+  }
+  series.update({column: packed['data'][column][start:end] for column in MODEL_PERFORMANCE_COLUMNS})
+  return series
+
+def client_region_switching_callback(source, packed_source, regions:dict, offsets:dict):
+  return CustomJS(
+    args={'source': source, 'packed': packed_source, 'regions': regions, 'offsets': offsets},
+    code="""
+      const region = regions[cb_obj.value]
+      if (region == null || offsets[region] == null)
+        return
+      const [start, end] = offsets[region]
+      const view = (values) => ArrayBuffer.isView(values) ? 
+        new Int32Array(values.buffer, values.byteOffset + 4*start, end - start) : values.slice(start, end)
+      const data = {x: Int32Array.from({length: end - start}, (_, i) => i)}
+      for (const column in packed.data)
+        data[column] = view(packed.data[column])
+      data.date = Float64Array.from(data.date, (days) => days*86400000)
+      source.data = data
+    """
+  )
+
+def warm_up_region_datasets(regions=None, background:bool=True):
+  if regions is None:
+    regions = region_datasets.popular(REGION_WARMUP_COUNT)
+  return region_datasets.warm_up(regions, load_region_records, background=background)
+
+def follow_region_generation()->bool:
+  current_key = current_generation_key()
+  if (current_key is None) or ('region_generation' not in shared_datasets):
+    return False
+  generation = region_generation()
+  if (generation is None) or (current_key in (generation.key, generation.observed_current_key)):
+    return False
+  print(f'Switching from shared dataset generation: {generation.key} to: {current_key} ...')
+  shared_datasets.refresh('region_generation')
+  region_datasets.invalidate()
+  generation = region_generation()
+  if generation is not None:
+    generation.observed_current_key = current_key
+  return True
+
 class SARS_COV2_Layout():
   def __init__(
       self, 
       default_region_selection='India', 
-      advanced_mode=False
+      advanced_mode=False,
+      client_region_switching=CLIENT_REGION_SWITCHING
     ):
     self.enable_source_creation=True
+    self.client_region_switching=client_region_switching
     self.default_region_selection=default_region_selection
     self.advanced_mode=advanced_mode
     self.model_performance=None
-    self.state_list=sorted(list(preds_df['state']))
+    self.state_list=sorted(list(preds_df['state'])) if preds_df is not None else []
     self.state_list.append('India (Aggregate)')
     self.state_select=Select(
       value=self.default_region_selection,
@@ -1303,46 +1380,63 @@ class SARS_COV2_Layout():
     self.place_holder_str='p_str'
     self.state_wise_model_perf_dict=dict()
     self.state_wise_model_perf_data=[]
+    self.source=None
+    self.map_plots=[]
+    self.map_source=None
+    self.marker_source=None
+    self.geometry_lod_state=dict()
+    self.layout_tabs=None
+    self.tab_builders=[]
+    self.built_tabs=set()
+    self.countrywide_series={'series': None, 'window': None}
+    self.regionwise_series={'series': None, 'window': None}
+    self.loads=None
 
   def build_dataset(self):
     self.state_list.append(self.place_holder)
     for s_idx, s in enumerate(list(self.state_list)):
       if s == self.place_holder or s is None:
         self.state_wise_model_perf_dict.update({self.place_holder_str : s_idx})
-        self.state_wise_model_perf_data.append([make_dataset(self.default_region_selection)])
+        self.state_wise_model_perf_data.append(self.default_region_selection)
       elif s == 'India (Aggregate)':
         self.state_wise_model_perf_dict.update({s : s_idx})
         self.state_wise_model_perf_dict.update({'India' : s_idx})
-        self.state_wise_model_perf_data.append([make_dataset('India')])
+        self.state_wise_model_perf_data.append('India')
       else:
         self.state_wise_model_perf_dict.update({s : s_idx})
-        self.state_wise_model_perf_data.append([make_dataset(s)])
+        self.state_wise_model_perf_data.append(s)
 
-  def read_model_performance_data(self):
+  def countrywide_region(self)->str:
     if self.default_region_selection == self.place_holder and self.default_region_selection is not None:
-      s = 'India'
-    else:
-      s = self.default_region_selection
-    try:
-      self.model_performance = pd.read_csv(
-        f'{DATA_URL}{PERF_FILENAME_POINTER_STR}{s}.csv'
-      )
-    except Exception as e:
-      e = getattr(e, 'message', repr(e))
-      print(f'Failed to read model performance data for India from URL due to: {e} ...')
+      return 'India'
+    return self.default_region_selection
 
-      India_model_performance_file = os_style_formatter(
-        f'{LOCAL_DATA_DIR}{PERF_FILENAME_POINTER_STR}{s}.csv'
-      )
-      print(India_model_performance_file)
-  
-      if os.path.exists(India_model_performance_file):
-        self.model_performance = pd.read_csv(India_model_performance_file)
-        print(f'Reading India model performance file: {India_model_performance_file} from saved repo ...')
-      else:
-        print('Failed to read India model performance file: {India_model_performance_file} ...')
+  def read_model_performance_data(self):
+    self.model_performance = model_performance_frame(self.countrywide_region())
+
+  def load_series(self, slot:str, key, load, apply):
+    if self.loads is None:
+      return apply(load())
+    return self.loads.request(slot, key, load, apply)
+
+  def apply_countrywide_series(self, series:dict)->bool:
+    self.countrywide_series.update({'series': series, 'window': None})
+    return decimate_source(self.countrywide_series['source'], self.countrywide_series)
+
+  def apply_region_series(self, series:dict)->bool:
+    self.regionwise_series.update({'series': series, 'window': None})
+    return decimate_source(self.source, self.regionwise_series)
+
+  def load_region_series(self, region:str):
+    if (self.loads is None) or (region in region_datasets):
+      if self.loads is not None:
+        self.loads.discard('regionwise')
+      return self.apply_region_series(region_dataset(region))
+    return self.load_series(
+      'regionwise', ('region_dataset', region), lambda: region_dataset(region), self.apply_region_series
+    )
 
-  def get_source(self):
+  def selected_region(self)->str:
     try:
       state_selection = self.state_select.value
     except NameError:
@@ -1356,14 +1450,15 @@ class SARS_COV2_Layout():
     else:
       state_idx = self.state_wise_model_perf_dict[state_selection]
 
+    return self.state_wise_model_perf_data[state_idx]
+
+  def get_source(self):
     if self.enable_source_creation:
       self.enable_source_creation = False
-      global source
-      source = self.state_wise_model_perf_data[state_idx][0]
-    else:
-      source.data.update(self.state_wise_model_perf_data[state_idx][0].data)
+      self.source = ColumnDataSource(empty_model_performance_series())
+    self.load_region_series(self.selected_region())
 
-    return source
+    return self.source
 
   def tab_switching_style_formatter(self, r=50, g=100, b=196):
     font_family      = f"font-family: '{HTML_FONT}'"
@@ -1426,62 +1521,368 @@ class SARS_COV2_Layout():
            """
 
   def update_plot(self, attrname, old, new):
-    new_source = self.get_source()
-    source.data.update(new_source.data)
+    self.get_source()
+
+  def refresh_series(self):
+    if self.countrywide_series.get('source') is not None:
+      region = self.countrywide_region()
+      self.load_series(
+        'countrywide', ('refreshed_model_performance_series', region),
+        lambda: model_performance_series(model_performance_frame(region)),
+        partial(refresh_series_source, self.countrywide_series)
+      )
+    if self.regionwise_series.get('source') is not None:
+      region = self.selected_region()
+      self.load_series(
+        'regionwise', ('refreshed_region_dataset', region), 
+        lambda: region_dataset(region), partial(refresh_series_source, self.regionwise_series)
+      )
+
+  def close(self):
+    if self.loads is not None:
+      self.loads.cancel()
+    if self.advanced_mode and not self.client_region_switching:
+      self.state_select.remove_on_change('value', self.update_plot)
+    if self.layout_tabs is not None:
+      self.layout_tabs.remove_on_change('active', self.update_tab)
+    self.source = None
+    self.model_performance = None
+    self.map_plots = []
+    self.map_source = None
+    self.marker_source = None
+    self.layout_tabs = None
+    self.tab_builders = []
+    self.countrywide_series = {'series': None, 'window': None}
+    self.regionwise_series = {'series': None, 'window': None}
+
+  def create_countrywide_model_performance_plot(self):
+    source = ColumnDataSource(empty_model_performance_series())
+    countrywide_plot = model_performance_plot(source, use_cds=True, enable_series_decimation=True)
+    attach_series_decimation(countrywide_plot, source, self.countrywide_series)
+    region = self.countrywide_region()
+    self.load_series(
+      'countrywide', ('model_performance_series', region), 
+      lambda: model_performance_series(model_performance_frame(region)), self.apply_countrywide_series
+    )
+    return countrywide_plot
 
   def create_countrywide_model_performance_tab(self):
     self.read_model_performance_data()
-    self.model_performance['date'] = self.model_performance['date'].apply(lambda x: date_formatter(x))
-    model_perf_plot = model_performance_plot(self.model_performance)  
     model_performance_tab = Tab_Panel(
-      child=model_perf_plot, 
+      child=model_performance_plot(self.model_performance), 
       title='Countrywide forecast performance'
     )
     return model_performance_tab
 
-  def create_statewise_model_performance_tab(self):
-    statewise_plot = model_performance_plot(self.get_source(), use_cds=True)
-    statewise_layout = Column_Layout(self.state_select, statewise_plot) 
-    statewise_perf_tab = Tab_Panel(
-      child=statewise_layout, 
+  def create_client_statewise_model_performance_layout(self):
+    packed = packed_region_series()
+    regions = {
+      region: 'India' if region in ('India', 'India (Aggregate)', self.place_holder) else region \
+        for region in self.state_list + [self.default_region_selection]
+    }
+    packed_source = ColumnDataSource(dict(packed['data']), syncable=False)
+    source = ColumnDataSource(
+      packed_region_slice(packed, regions.get(self.state_select.value, 'India')), 
+      syncable=False
+    )
+    self.state_select.js_on_change('value', client_region_switching_callback(
+      source, packed_source, regions, {region: list(offsets) for region, offsets in packed['offsets'].items()}
+    ))
+    statewise_plot = model_performance_plot(source, use_cds=True)
+    return Column_Layout(self.state_select, statewise_plot)
+
+  def create_regionwise_model_performance_tab(self):
+    model_performance_tab = Tab_Panel(
+      child=self.create_client_statewise_model_performance_layout(), 
       title='Regionwise forecast performance'
     )
-    return statewise_perf_tab
+    return model_performance_tab
+
+  def create_statewise_model_performance_layout(self):
+    if self.client_region_switching:
+      return self.create_client_statewise_model_performance_layout()
+    source = self.get_source()
+    statewise_plot = model_performance_plot(source, use_cds=True, enable_series_decimation=True)
+    attach_series_decimation(statewise_plot, source, self.regionwise_series)
+    return Column_Layout(self.state_select, statewise_plot) 
+
+  def create_map_tab_plot(self, map_tab:int):
+    map_plot = create_map_plot(map_tab, self.map_source, self.marker_source, map_geometry_levels)
+    attach_geometry_lod([map_plot], self.map_source, map_geometry_levels, self.geometry_lod_state)
+    self.map_plots.append(map_plot)
+    return map_plot
+
+  def create_tab_builders(self)->list:
+    tab_builders = [
+      (title, lambda map_tab=map_tab: self.create_map_tab_plot(map_tab)) \
+        for map_tab, title in enumerate(MAP_TAB_TITLES)
+    ]
+    tab_builders.append(('Countrywide forecast performance', self.create_countrywide_model_performance_plot))
+    tab_builders.append(('Regionwise forecast performance', self.create_statewise_model_performance_layout))
+    return tab_builders
+
+  def tab_placeholder(self):
+    return Div(text='', width=512, height=512, name=TAB_PLACEHOLDER_NAME)
+
+  def activate_tab(self, tab_idx:int)->bool:
+    if (self.layout_tabs is None) or (tab_idx in self.built_tabs) or \
+       (tab_idx is None) or not (0 <= tab_idx < len(self.tab_builders)):
+      return False
+    started = time.perf_counter()
+    title, tab_builder = self.tab_builders[tab_idx]
+    self.layout_tabs.tabs[tab_idx].child = tab_builder()
+    self.built_tabs.add(tab_idx)
+    if verbose:
+      print(f'Built tab: {title} in {time.perf_counter() - started:.3f}s ...')
+    return True
+
+  def update_tab(self, attrname, old, new):
+    self.activate_tab(new)
 
   def create_sars_cov2_layout(self, default_region_selection='India'):
+    self.map_source, self.marker_source = create_map_sources(geometry_lod=True)
     if self.advanced_mode:
       self.default_region_selection = default_region_selection
-      self.state_select.on_change('value', self.update_plot)
+      if not self.client_region_switching:
+        self.state_select.on_change('value', self.update_plot)
       self.build_dataset()
-      statewise_perf_tab = self.create_statewise_model_performance_tab()
-      countrywide_perf_tab = self.create_countrywide_model_performance_tab()
-      viz_tabs = create_visualization_tabs(advanced_mode=advanced_mode)
-      viz_tabs.extend([countrywide_perf_tab, statewise_perf_tab])
-      sars_cov2_layout_tabs = Tabs(tabs=viz_tabs)
+      warm_up_region_datasets()
+      self.tab_builders = self.create_tab_builders()
+      sars_cov2_layout_tabs = Tabs(
+        tabs=[Tab_Panel(child=self.tab_placeholder(), title=title) for title, _ in self.tab_builders]
+      )
       sars_cov2_layout_tabs.stylesheets.append(self.tab_switching_style_formatter())
+      self.layout_tabs = sars_cov2_layout_tabs
+      self.activate_tab(sars_cov2_layout_tabs.active)
+      sars_cov2_layout_tabs.on_change('active', self.update_tab)
       sars_cov2_layout = sars_cov2_layout_tabs
       return sars_cov2_layout, self.state_select
     else:
-      sars_cov2_layout = Column_Layout(basic_sars_cov2_plot)
+      sars_cov2_layout = Column_Layout(self.create_map_tab_plot(0))
       return sars_cov2_layout, None
 
-curdoc().title = app_title
+  def template_bindings(self)->dict:
+    return {
+      'layout_tabs': self.layout_tabs,
+      'map_plots': self.map_plots,
+      'map_source': self.map_source,
+      'marker_source': self.marker_source
+    }
+
+  def bind_sars_cov2_layout(self, models:dict, default_region_selection='India'):
+    self.map_source = models.get('map_source')
+    self.marker_source = models.get('marker_source')
+    self.map_plots = list(models.get('map_plots') or [])
+    if self.map_source is not None:
+      attach_geometry_lod(self.map_plots, self.map_source, map_geometry_levels, self.geometry_lod_state)
+    if self.advanced_mode:
+      self.default_region_selection = default_region_selection
+      if not self.client_region_switching:
+        self.state_select.on_change('value', self.update_plot)
+      self.build_dataset()
+      warm_up_region_datasets()
+      self.tab_builders = self.create_tab_builders()
+      self.layout_tabs = models['layout_tabs']
+      self.built_tabs = {
+        tab_idx for tab_idx, tab in enumerate(self.layout_tabs.tabs) if tab.child.name != TAB_PLACEHOLDER_NAME
+      }
+      self.layout_tabs.on_change('active', self.update_tab)
+      return self.state_select
+    return None
+
+def document_template_key()->tuple:
+  generation = region_generation() if advanced_mode else None
+  return (shared_datasets.generation, generation.key if generation is not None else None)
+
+def build_document_template()->tuple:
+  plot_layout = SARS_COV2_Layout(
+    default_region_selection='India', 
+    advanced_mode=advanced_mode
+  )
+  sars_cov2_layout, _ = plot_layout.create_sars_cov2_layout()
+  bindings = plot_layout.template_bindings()
+  plot_layout.close()
+  return [sars_cov2_layout], bindings, app_title
+
+def data_update_date(model_performance:'Pandas dataframe', column:str)->'str or None':
+  reported = model_performance['date'][model_performance[column].notna()].to_numpy()
+  if not len(reported):
+    return None
+  return pd.Timestamp(parse_dates(reported).max()).strftime('%d-%b-%Y')
+
+def data_refresh_pointers()->list:
+  pointers = [SARSCOV2_STATS_CSV_FILENAME_POINTER_STR, SARSCOV2_FORECASTS_FILENAME_POINTER_STR]
+  if advanced_mode:
+    pointers += [model_performance_pointer(region) for region in model_performance_regions()]
+  return pointers
+
+def refresh_session(session, refresh:dict):
+  document, plot_layout = session.document, session.layout
+  if (document is None) or (plot_layout is None):
+    return
+  for source, patches, data in (
+    (plot_layout.map_source, refresh['map_patches'], map_attributes),
+    (plot_layout.marker_source, refresh['marker_patches'], map_marker_data)
+  ):
+    if source is None:
+      continue
+    if patches is None:
+      source.data.update({column: values for column, values in data.items() if column not in ('xs', 'ys')})
+    else:
+      patch_source(source, patches)
+
+  for color_mapper in document.select({'type': LinearColorMapper}):
+    if color_mapper.tags and (color_mapper.tags[0] in map_attributes):
+      color_field, enable_performance_stats = color_mapper.tags
+      color_mapper.high = color_mapper_high(map_attributes[color_field], enable_performance_stats)
+
+  for source in document.select({'name': INDIA_TOTALS_SOURCE_NAME}):
+    totals = india_totals(sars_cov2_data, advanced_plotting='MAPE' in source.data)
+    patch_source(source, column_patches(source.data, totals, columns=list(totals)))
+
+  for hover in document.select({'type': HoverTool}):
+    if isinstance(hover.tooltips, str):
+      tooltips = hover.tooltips
+      for old, new in refresh['dates']:
+        tooltips = tooltips.replace(old, new)
+      if tooltips != hover.tooltips:
+        hover.tooltips = tooltips
+
+  if refresh['series']:
+    plot_layout.refresh_series()
+
+def refresh_app_datasets(changed:dict)->dict:
+  datasets = sars_cov2_datasets
+  old_dates = {'Data': DATA_UPDATE_DATE, 'Forecasts': FORECASTS_UPDATE_DATE}
+  new_dates = dict(old_dates)
+
+  if {SARSCOV2_STATS_CSV_FILENAME_POINTER_STR, SARSCOV2_FORECASTS_FILENAME_POINTER_STR} & set(changed):
+    shared_datasets.refresh('sars_cov2_datasets')
+    datasets = shared_datasets.get('sars_cov2_datasets', load_sars_cov2_datasets)
+
+  refresh_series = advanced_mode and any(pointer.startswith(PERF_FILENAME_POINTER_STR) for pointer in changed)
+  if refresh_series:
+    if 'region_generation' in shared_datasets:
+      shared_datasets.refresh('region_generation')
+    region_datasets.invalidate()
+    for key in shared_datasets.keys():
+      if isinstance(key, tuple) and key[0] == 'model_performance_frame':
+        shared_datasets.invalidate(key)
+    model_performance = model_performance_frame('India')
+    for label, column in (('Data', 'total_cases'), ('Forecasts', 'preds_cases')):
+      new_dates[label] = data_update_date(model_performance, column) or new_dates[label]
+
+  refresh = {
+    'map_patches': column_patches(sars_cov2_datasets['shared_map_attributes'], datasets['shared_map_attributes']),
+    'marker_patches': column_patches(sars_cov2_datasets['shared_marker_data'], datasets['shared_marker_data']),
+    'dates': [
+      (f'{label} updated on: <strong>{old_dates[label]}</strong>', f'{label} updated on: <strong>{new_dates[label]}</strong>') \
+        for label in old_dates if old_dates[label] != new_dates[label]
+    ],
+    'series': refresh_series
+  }
+
+  swap = partial(apply_app_refresh, datasets, new_dates, refresh)
+  if data_refresh_loop is None:
+    swap()
+  else:
+    data_refresh_loop.add_callback(swap)
+  return refresh
+
+def apply_app_refresh(datasets:dict, dates:dict, refresh:dict):
+  global DATA_UPDATE_DATE, FORECASTS_UPDATE_DATE
+  install_app_datasets(datasets)
+  DATA_UPDATE_DATE, FORECASTS_UPDATE_DATE = dates['Data'], dates['Forecasts']
+
+  sessions = session_registry.sessions()
+  for session in sessions:
+    document = session.document
+    if document is not None:
+      document.add_next_tick_callback(partial(refresh_session, session, refresh))
+  if verbose:
+    print(f"Patched {sum(len(patch) for patch in (refresh['map_patches'] or dict()).values())} map cells "
+          f'for {len(sessions)} live sessions ...')
+
+data_refresh_loop = None
+data_refresh = None
+
+def start_data_refresh()->'DataRefreshService':
+  global data_refresh, data_refresh_loop
+  if REFRESH_INTERVAL <= 0:
+    return None
+  from tornado.ioloop import IOLoop
+
+  data_refresh_loop = IOLoop.current()
+  if data_refresh is None:
+    data_refresh = DataRefreshService(
+      DataFileWatcher(local_data_file, data_refresh_pointers()), 
+      refresh_app_datasets,
+      loader=dataset_loader
+    )
+  data_refresh.start()
+  return data_refresh
+
+def stop_data_refresh():
+  if data_refresh is not None:
+    data_refresh.stop()
+
+def on_server_loaded(server_context):
+  started = time.perf_counter()
+  load_app_datasets()
+  if advanced_mode:
+    region_generation()
+  print(f'Preloaded SARS-CoV2 datasets in {time.perf_counter() - started:.2f}s ...')
+  document_templates.fill(document_templates.template(document_template_key(), build_document_template))
+  start_session_stats_logging()
+  start_data_refresh()
+
+def on_server_unloaded(server_context):
+  stop_session_stats_logging()
+  stop_data_refresh()
+  dataset_loader.shutdown()
+  connection_pool.close()
+
+def create_document(doc):
+  load_app_datasets()
+  if advanced_mode:
+    follow_region_generation()
+  template, roots = document_templates.checkout(document_template_key(), build_document_template)
+  doc.title = template.title
+  for root in roots:
+    doc.add_root(root)
+  plot_layout = SARS_COV2_Layout(
+    default_region_selection='India', 
+    advanced_mode=advanced_mode
+  )
+  if doc.session_context is not None:
+    plot_layout.loads = SessionLoads(doc)
+  plot_layout.bind_sars_cov2_layout(template.bind(doc))
+
+  if doc.session_context is not None:
+    session_registry.open(doc.session_context.id, document=doc, layout=plot_layout)
+    doc.on_session_destroyed(on_session_destroyed)
+
+  return doc
+
+def on_session_destroyed(session_context):
+  session_registry.close(session_context.id)
+  if verbose:
+    print(f'Closed SARS-CoV2 session: {session_context.id}, {session_registry.summary()} ...')
 
 if __name__ == '__main__':
+  load_app_datasets()
   out_file('India_SARS_CoV2.html')
   viz_tabs = create_visualization_tabs(advanced_mode=advanced_mode)
-  plot_layout = SARS_COV2_Layout(advanced_mode=advanced_mode)
+  plot_layout = SARS_COV2_Layout(advanced_mode=advanced_mode, client_region_switching=True)
   perf_tab = plot_layout.create_countrywide_model_performance_tab()
   viz_tabs.append(perf_tab)
+  if advanced_mode:
+    viz_tabs.append(plot_layout.create_regionwise_model_performance_tab())
   plot_tab = Tabs(tabs=viz_tabs)
   plot_tab.stylesheets.append(plot_layout.tab_switching_style_formatter())
   save(
     plot_tab, 
     title='India SARS-CoV2 statewise statistics'
   )
-else:
-  sars_cov2_layout, _ = SARS_COV2_Layout(
-    default_region_selection='India', 
-    advanced_mode=advanced_mode
-  ).create_sars_cov2_layout()
-  curdoc().add_root(sars_cov2_layout)
\ No newline at end of file
+elif __name__.startswith('bokeh_app_'):
+  create_document(curdoc())
@@ -0,0 +1 @@
+from India_SARS_CoV2 import on_server_loaded, on_server_unloaded
@@ -0,0 +1,4 @@
+from bokeh.io.doc import curdoc
+from India_SARS_CoV2 import create_document
+
+create_document(curdoc())
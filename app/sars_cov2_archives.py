@@ -0,0 +1,322 @@
+import os, re, json, time, hashlib, argparse, \
+       numpy as np, pandas as pd
+
+from datetime import datetime
+from sars_cov2_data import CACHE_DIR, REPO_DATA_DIR, apply_corrections
+
+STORE_FORMAT_VERSION = 2
+ARCHIVE_STORE_DIR = os.environ.get(
+  'SARS_COV2_ARCHIVE_STORE_DIR',
+  os.path.join(CACHE_DIR, 'archive_store')
+)
+
+ARCHIVE_SPECS = {
+  'statewise': {
+    'archive_dir': os.path.join('Coronavirus_stats', 'India', 'archives'),
+    'pattern': re.compile(r'^India_SARS_CoV2_statewise_(\d{8})\.csv$'),
+    'metrics': ['total_cases', 'discharged', 'deaths', 'active_cases'],
+    'mean_metrics': [],
+    'dtype': 'int32',
+    'missing': -1
+  },
+  'forecasts': {
+    'archive_dir': os.path.join('Coronavirus_stats', 'India', 'experimental', 'archives'),
+    'pattern': re.compile(r'^output_preds_(\d{8})\.csv$'),
+    'metrics': ['preds_cases', 'preds_cases_3', 'preds_cases_7',
+                'preds_cases_std', 'preds_cases_3_std', 'preds_cases_7_std',
+                'MAPE', 'MAPE_3', 'MAPE_7'],
+    'mean_metrics': ['MAPE', 'MAPE_3', 'MAPE_7'],
+    'dtype': 'float64',
+    'missing': float('nan')
+  }
+}
+
+verbose = False
+
+def archive_files(kind:str, archive_dir:str=None)->dict:
+  spec = ARCHIVE_SPECS[kind]
+  archive_dir = archive_dir or os.path.join(REPO_DATA_DIR, spec['archive_dir'])
+  snapshots = dict()
+  for file_name in sorted(os.listdir(archive_dir)):
+    match = spec['pattern'].match(file_name)
+    if match:
+      snapshots[file_name] = (
+        np.datetime64(datetime.strptime(match.group(1), '%Y%m%d').date(), 'D'),
+        os.path.join(archive_dir, file_name)
+      )
+  return snapshots
+
+def file_sha256(file_path:str)->str:
+  with open(file_path, 'rb') as f:
+    return hashlib.sha256(f.read()).hexdigest()
+
+def file_signature(file_path:str, date, sha256:str=None)->dict:
+  stat = os.stat(file_path)
+  return {
+    'date': str(date),
+    'size': stat.st_size,
+    'mtime_ns': stat.st_mtime_ns,
+    'sha256': sha256 or file_sha256(file_path)
+  }
+
+def changed_snapshots(snapshots:dict, known_files:dict)->dict:
+  changed = dict()
+  for file_name, (date, snapshot_file) in snapshots.items():
+    known = known_files.get(file_name)
+    if known is None or known.get('date') != str(date):
+      changed[file_name] = (date, snapshot_file)
+      continue
+    stat = os.stat(snapshot_file)
+    if stat.st_size == known.get('size') and stat.st_mtime_ns == known.get('mtime_ns'):
+      continue
+    if file_sha256(snapshot_file) != known.get('sha256'):
+      changed[file_name] = (date, snapshot_file)
+    else:
+      known_files[file_name] = file_signature(snapshot_file, date, sha256=known.get('sha256'))
+  return changed
+
+def read_snapshot(kind:str, snapshot_file:str)->'Pandas dataframe':
+  spec = ARCHIVE_SPECS[kind]
+  snapshot_df = pd.read_csv(
+    snapshot_file,
+    usecols=lambda column: column == 'state' or column in spec['metrics']
+  )
+  for metric in spec['metrics']:
+    if metric not in snapshot_df.columns:
+      snapshot_df[metric] = np.nan
+  return snapshot_df[['state'] + spec['metrics']]
+
+def aggregate_snapshots(kind:str, snapshots_df:'Pandas dataframe')->'Pandas dataframe':
+  spec = ARCHIVE_SPECS[kind]
+  snapshots_df = apply_corrections(snapshots_df)
+  grouped = snapshots_df.groupby(['date', 'state'], sort=True)
+  sum_metrics = [metric for metric in spec['metrics'] if metric not in spec['mean_metrics']]
+  aggregated_df = grouped[sum_metrics].sum(min_count=1)
+  if spec['mean_metrics']:
+    aggregated_df = aggregated_df.join(grouped[spec['mean_metrics']].mean())
+  return aggregated_df[spec['metrics']]
+
+def snapshots_to_array(kind:str, aggregated_df:'Pandas dataframe', dates, states)->np.ndarray:
+  spec = ARCHIVE_SPECS[kind]
+  date_index = pd.Index(dates)
+  state_index = pd.Index(states)
+  values = np.full((len(dates), len(states), len(spec['metrics'])), spec['missing'], dtype=spec['dtype'])
+  date_idx = date_index.get_indexer(aggregated_df.index.get_level_values('date'))
+  state_idx = state_index.get_indexer(aggregated_df.index.get_level_values('state'))
+  metric_values = aggregated_df[spec['metrics']].to_numpy(dtype='float64')
+  if np.issubdtype(values.dtype, np.integer):
+    metric_values = np.where(np.isnan(metric_values), spec['missing'], metric_values)
+  values[date_idx, state_idx, :] = metric_values.astype(spec['dtype'])
+  return values
+
+def load_snapshots(kind:str, snapshots:dict)->'Pandas dataframe':
+  frames = []
+  for file_name, (date, snapshot_file) in snapshots.items():
+    try:
+      frames.append(read_snapshot(kind, snapshot_file).assign(date=date))
+    except Exception as e:
+      e = getattr(e, 'message', repr(e))
+      print(f'Failed reading archive snapshot: {file_name} due to: {e} ...')
+  return aggregate_snapshots(kind, pd.concat(frames, ignore_index=True))
+
+def _write_store(store_dir:str, values:np.ndarray, meta:dict):
+  os.makedirs(store_dir, exist_ok=True)
+  tmp_values_file = os.path.join(store_dir, f'values.bin.{os.getpid()}.tmp')
+  values.tofile(tmp_values_file)
+  os.replace(tmp_values_file, os.path.join(store_dir, 'values.bin'))
+  _write_meta(store_dir, meta)
+
+def _write_meta(store_dir:str, meta:dict):
+  tmp_meta_file = os.path.join(store_dir, f'meta.json.{os.getpid()}.tmp')
+  with open(tmp_meta_file, 'w') as f:
+    json.dump(meta, f)
+  os.replace(tmp_meta_file, os.path.join(store_dir, 'meta.json'))
+
+def store_meta(kind:str, values_shape, dates, states, files:dict)->dict:
+  spec = ARCHIVE_SPECS[kind]
+  return {
+    'format': STORE_FORMAT_VERSION,
+    'kind': kind,
+    'dtype': spec['dtype'],
+    'missing': None if np.isnan(spec['missing']) else spec['missing'],
+    'shape': list(values_shape),
+    'metrics': spec['metrics'],
+    'states': list(states),
+    'dates': [str(date) for date in dates],
+    'files': files
+  }
+
+def build_archive_store(kind:str, archive_dir:str=None, store_dir:str=None)->'ArchiveStore':
+  spec = ARCHIVE_SPECS[kind]
+  store_dir = store_dir or os.path.join(ARCHIVE_STORE_DIR, kind)
+  start_time = time.perf_counter()
+  snapshots = archive_files(kind, archive_dir)
+  if not snapshots:
+    raise FileNotFoundError(f'No {kind} archive snapshots found ...')
+  aggregated_df = load_snapshots(kind, snapshots)
+  dates = np.array(sorted({date for date, _ in snapshots.values()}), dtype='datetime64[D]')
+  states = sorted(aggregated_df.index.get_level_values('state').unique())
+  values = snapshots_to_array(kind, aggregated_df, dates, states)
+  files = {
+    file_name: file_signature(snapshot_file, date) for file_name, (date, snapshot_file) in snapshots.items()
+  }
+  _write_store(store_dir, values, store_meta(kind, values.shape, dates, states, files))
+  print(f'Built {kind} archive store with: {len(dates)} days x {len(states)} states x '
+        f'{len(spec["metrics"])} metrics in: {time.perf_counter() - start_time:.2f} seconds ...')
+  return ArchiveStore(store_dir)
+
+def update_archive_store(kind:str, archive_dir:str=None, store_dir:str=None)->'ArchiveStore':
+  spec = ARCHIVE_SPECS[kind]
+  store_dir = store_dir or os.path.join(ARCHIVE_STORE_DIR, kind)
+  try:
+    store = ArchiveStore(store_dir)
+  except Exception as e:
+    e = getattr(e, 'message', repr(e))
+    print(f'Rebuilding {kind} archive store due to: {e} ...')
+    return build_archive_store(kind, archive_dir=archive_dir, store_dir=store_dir)
+
+  start_time = time.perf_counter()
+  files = dict(store.meta['files'])
+  snapshots = archive_files(kind, archive_dir)
+  removed = sorted(set(files) - set(snapshots)) or \
+            sorted(set(store.meta['dates']) - {str(date) for date, _ in snapshots.values()})
+  if removed:
+    del store
+    print(f'Rebuilding {kind} archive store, snapshots no longer on disk: {", ".join(removed)} ...')
+    return build_archive_store(kind, archive_dir=archive_dir, store_dir=store_dir)
+
+  changed = changed_snapshots(snapshots, files)
+  if not changed:
+    if files != store.meta['files']:
+      _write_meta(store_dir, dict(store.meta, files=files))
+    print(f'No new {kind} archive snapshots to ingest ...')
+    return ArchiveStore(store_dir)
+
+  aggregated_df = load_snapshots(kind, changed)
+  changed_dates = np.array(sorted({date for date, _ in changed.values()}), dtype='datetime64[D]')
+  new_states = [
+    state for state in aggregated_df.index.get_level_values('state').unique() if state not in store.state_index
+  ]
+  states = store.states + sorted(new_states)
+  new_dates = changed_dates[~np.isin(changed_dates, store.dates)]
+  existing_dates = changed_dates[np.isin(changed_dates, store.dates)]
+  values_file = os.path.join(store_dir, 'values.bin')
+  row_nbytes = len(store.states) * len(spec['metrics']) * np.dtype(spec['dtype']).itemsize
+  appendable = not new_states and (
+    len(new_dates) == 0 or len(store.dates) == 0 or new_dates[0] > store.dates[-1]
+  )
+
+  if appendable:
+    if len(existing_dates):
+      existing_values = snapshots_to_array(kind, aggregated_df, existing_dates, states)
+      writable_values = np.memmap(values_file, dtype=spec['dtype'], mode='r+', shape=store.values.shape)
+      writable_values[np.searchsorted(store.dates, existing_dates)] = existing_values
+      writable_values.flush()
+      del writable_values
+    dates = np.concatenate([store.dates, new_dates])
+    if len(new_dates):
+      new_values = snapshots_to_array(kind, aggregated_df, new_dates, states)
+      with open(values_file, 'r+b') as f:
+        f.truncate(row_nbytes * len(store.dates))
+        f.seek(0, os.SEEK_END)
+        f.write(new_values.tobytes())
+    values_shape = (len(dates), len(states), len(spec['metrics']))
+  else:
+    dates = np.union1d(store.dates, new_dates).astype('datetime64[D]')
+    values = np.full((len(dates), len(states), len(spec['metrics'])), spec['missing'], dtype=spec['dtype'])
+    values[np.searchsorted(dates, store.dates), :len(store.states)] = store.values
+    values[np.searchsorted(dates, changed_dates)] = snapshots_to_array(kind, aggregated_df, changed_dates, states)
+    _write_store(store_dir, values, store_meta(kind, values.shape, dates, states, files))
+    values_shape = values.shape
+
+  for file_name, (date, snapshot_file) in changed.items():
+    files[file_name] = file_signature(snapshot_file, date)
+  del store
+  _write_meta(store_dir, store_meta(kind, values_shape, dates, states, files))
+  print(f'Ingested: {len(changed)} {kind} archive snapshots ({len(new_dates)} new days) '
+        f'{"in place" if appendable else "by rewriting the store"} in: {time.perf_counter() - start_time:.2f} seconds ...')
+  return ArchiveStore(store_dir)
+
+class ArchiveStore():
+  def __init__(self, store_dir:str):
+    self.store_dir = store_dir
+    with open(os.path.join(store_dir, 'meta.json'), 'r') as f:
+      self.meta = json.load(f)
+    if self.meta.get('format') != STORE_FORMAT_VERSION:
+      raise ValueError(f'Unsupported archive store format: {self.meta.get("format")} ...')
+    self.kind = self.meta['kind']
+    self.metrics = self.meta['metrics']
+    self.states = self.meta['states']
+    self.dates = np.array(self.meta['dates'], dtype='datetime64[D]')
+    self.missing = self.meta['missing'] if self.meta['missing'] is not None else np.nan
+    self.state_index = {state: idx for idx, state in enumerate(self.states)}
+    self.metric_index = {metric: idx for idx, metric in enumerate(self.metrics)}
+    self.values = np.memmap(
+      os.path.join(store_dir, 'values.bin'),
+      dtype=self.meta['dtype'],
+      mode='r',
+      shape=tuple(self.meta['shape'])
+    )
+
+  @classmethod
+  def open(cls, kind:str='statewise', store_dir:str=None, build:bool=True, refresh:bool=False)->'ArchiveStore':
+    store_dir = store_dir or os.path.join(ARCHIVE_STORE_DIR, kind)
+    if refresh:
+      return update_archive_store(kind, store_dir=store_dir)
+    if not os.path.exists(os.path.join(store_dir, 'meta.json')):
+      if not build:
+        raise FileNotFoundError(f'No {kind} archive store found at: {store_dir} ...')
+      return build_archive_store(kind, store_dir=store_dir)
+    return cls(store_dir)
+
+  def date_slice(self, start=None, end=None)->slice:
+    start_idx = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+    end_idx = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+    return slice(start_idx, end_idx)
+
+  def query(self, states=None, metrics=None, start=None, end=None)->np.ndarray:
+    values = self.values[self.date_slice(start, end)]
+    if states is not None:
+      values = values[:, [self.state_index[state] for state in states], :]
+    if metrics is not None:
+      values = values[:, :, [self.metric_index[metric] for metric in metrics]]
+    return values
+
+  def series(self, state:str, metric:str='total_cases', start=None, end=None)->'Pandas series':
+    date_slice = self.date_slice(start, end)
+    values = self.values[date_slice, self.state_index[state], self.metric_index[metric]]
+    return pd.Series(
+      np.where(values == self.missing, np.nan, values) if not np.isnan(self.missing) else values,
+      index=pd.DatetimeIndex(self.dates[date_slice], name='date'),
+      name=metric
+    )
+
+  def snapshot(self, date)->'Pandas dataframe':
+    date_idx = int(np.searchsorted(self.dates, np.datetime64(date, 'D'), side='left'))
+    if date_idx >= len(self.dates) or self.dates[date_idx] != np.datetime64(date, 'D'):
+      raise KeyError(f'No {self.kind} snapshot for: {date} ...')
+    snapshot_df = pd.DataFrame(self.values[date_idx], index=pd.Index(self.states, name='state'), columns=self.metrics)
+    return snapshot_df.replace(self.missing, np.nan) if not np.isnan(self.missing) else snapshot_df
+
+  def __repr__(self):
+    return f'ArchiveStore(kind={self.kind}, days={len(self.dates)}, states={len(self.states)}, metrics={len(self.metrics)})'
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Pack the daily SARS-CoV2 archive snapshots into a memory-mappable store, ingesting only new or changed snapshots')
+  parser.add_argument('--kind', default='all', choices=['all'] + list(ARCHIVE_SPECS))
+  parser.add_argument('--archive-dir', default=None)
+  parser.add_argument('--store-dir', default=None)
+  parser.add_argument('--rebuild', action='store_true', help='rebuild the store from every snapshot')
+  args = parser.parse_args(argv)
+
+  kinds = list(ARCHIVE_SPECS) if args.kind == 'all' else [args.kind]
+  for kind in kinds:
+    store_dir = os.path.join(args.store_dir, kind) if args.store_dir else None
+    if args.rebuild:
+      store = build_archive_store(kind, archive_dir=args.archive_dir, store_dir=store_dir)
+    else:
+      store = update_archive_store(kind, archive_dir=args.archive_dir, store_dir=store_dir)
+    print(store)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,611 @@
+import os, re, sys, json, time, queue, socket, hashlib, threading, \
+       http.client, numpy as np, pandas as pd
+
+from types import MappingProxyType
+from collections import Counter, OrderedDict
+from urllib.parse import quote, urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sars_cov2_loader import dataset_loader
+
+CACHE_VERSION = 'v1'
+CACHE_DIR = os.environ.get(
+  'SARS_COV2_CACHE_DIR',
+  os.path.join(os.path.expanduser('~'), '.cache', 'covid19-visualization')
+)
+REPO_DATA_DIR = os.path.abspath(
+  os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+)
+
+OFFLINE_MODE = os.environ.get('SARS_COV2_OFFLINE', '0').lower() in ('1', 'true', 'yes')
+REMOTE_TIMEOUT = float(os.environ.get('SARS_COV2_REMOTE_TIMEOUT', 3.0))
+REVALIDATION_INTERVAL = float(os.environ.get('SARS_COV2_REVALIDATION_INTERVAL', 3600))
+OFFLINE_BACKOFF = 300
+MAX_CONNECTIONS = int(os.environ.get('SARS_COV2_MAX_CONNECTIONS', 8))
+REGION_CACHE_MAX_BYTES = int(float(os.environ.get('SARS_COV2_REGION_CACHE_MB', 64)) * (1 << 20))
+REGION_WARMUP_COUNT = int(os.environ.get('SARS_COV2_REGION_WARMUP', 4))
+
+verbose = False
+
+_offline_until = 0.
+_cache_lock = threading.RLock()
+_revalidating = set()
+_revalidation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='revalidate')
+
+class ConnectionPool():
+  def __init__(self, maxsize:int=MAX_CONNECTIONS, timeout:float=REMOTE_TIMEOUT):
+    self.maxsize = maxsize
+    self.timeout = timeout
+    self._idle = dict()
+    self._lock = threading.Lock()
+    self._slots = threading.BoundedSemaphore(maxsize)
+
+  def _acquire(self, key):
+    with self._lock:
+      idle = self._idle.setdefault(key, queue.LifoQueue())
+    try:
+      return idle.get_nowait(), True
+    except queue.Empty:
+      scheme, host, port = key
+      connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+      return connection_class(host, port, timeout=self.timeout), False
+
+  def _release(self, key, connection):
+    idle = self._idle[key]
+    if idle.qsize() < self.maxsize:
+      idle.put(connection)
+    else:
+      connection.close()
+
+  def request(self, url:str, headers=None)->tuple:
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    path = f'{parts.path}?{parts.query}' if parts.query else parts.path
+    with self._slots:
+      for attempt in range(2):
+        connection, reused = self._acquire(key)
+        try:
+          connection.request('GET', path, headers=headers or {})
+          response = connection.getresponse()
+          body = response.read()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+          connection.close()
+          if reused and attempt == 0:
+            continue
+          raise
+        except Exception:
+          connection.close()
+          raise
+        if response.will_close:
+          connection.close()
+        else:
+          self._release(key, connection)
+        return response.status, response.headers, body
+
+  def close(self):
+    with self._lock:
+      for idle in self._idle.values():
+        while not idle.empty():
+          idle.get_nowait().close()
+      self._idle.clear()
+
+connection_pool = ConnectionPool()
+
+def freeze_dataset(dataset):
+  if isinstance(dataset, np.ndarray):
+    dataset.flags.writeable = False
+    return dataset
+  if isinstance(dataset, (dict, MappingProxyType)):
+    return MappingProxyType({key: freeze_dataset(value) for key, value in dataset.items()})
+  if isinstance(dataset, list):
+    return tuple(freeze_dataset(value) for value in dataset)
+  return dataset
+
+class SharedDatasetCache():
+  def __init__(self):
+    self.generation = 0
+    self._entries = dict()
+    self._builders = dict()
+    self._build_times = dict()
+    self._lock = threading.RLock()
+    self._key_locks = dict()
+
+  def _key_lock(self, key):
+    with self._lock:
+      return self._key_locks.setdefault(key, threading.Lock())
+
+  def get(self, key, builder=None):
+    try:
+      return self._entries[key]
+    except KeyError:
+      pass
+    with self._key_lock(key):
+      if key not in self._entries:
+        if builder is None:
+          builder = self._builders.get(key)
+        if builder is None:
+          raise KeyError(f'No dataset builder registered for: {key}')
+        self._build(key, builder)
+      return self._entries[key]
+
+  def _build(self, key, builder):
+    start_time = time.perf_counter()
+    dataset = freeze_dataset(builder())
+    with self._lock:
+      self._entries[key] = dataset
+      self._builders[key] = builder
+      self._build_times[key] = time.perf_counter() - start_time
+    if verbose:
+      print(f'Built shared dataset: {key} in: {self._build_times[key]:.3f} seconds ...')
+    return dataset
+
+  def refresh(self, key=None):
+    keys = [key] if key is not None else list(self._builders)
+    for k in keys:
+      with self._key_lock(k):
+        self._build(k, self._builders[k])
+    with self._lock:
+      self.generation += 1
+    return self.generation
+
+  def invalidate(self, key=None):
+    with self._lock:
+      if key is None:
+        self._entries.clear()
+      else:
+        self._entries.pop(key, None)
+      self.generation += 1
+    return self.generation
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def keys(self):
+    return list(self._entries)
+
+  def stats(self)->dict:
+    return {
+      'generation': self.generation,
+      'entries': len(self._entries),
+      'build_seconds': dict(self._build_times)
+    }
+
+shared_datasets = SharedDatasetCache()
+
+def dataset_nbytes(dataset)->int:
+  if isinstance(dataset, np.ndarray):
+    return int(dataset.nbytes)
+  if isinstance(dataset, (dict, MappingProxyType)):
+    return sum(dataset_nbytes(value) for value in dataset.values())
+  if isinstance(dataset, (list, tuple)):
+    return sum(dataset_nbytes(value) for value in dataset)
+  return sys.getsizeof(dataset)
+
+class RegionLRUCache():
+  def __init__(self, max_bytes:int=REGION_CACHE_MAX_BYTES):
+    self.max_bytes = max_bytes
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.popularity = Counter()
+    self._entries = OrderedDict()
+    self._sizes = dict()
+    self._lock = threading.RLock()
+    self._key_locks = dict()
+    self._warming = set()
+
+  def _key_lock(self, key):
+    with self._lock:
+      return self._key_locks.setdefault(key, threading.Lock())
+
+  def _lookup(self, key, count:bool):
+    with self._lock:
+      if count:
+        self.popularity[key] += 1
+      if key in self._entries:
+        self._entries.move_to_end(key)
+        return self._entries[key]
+    return None
+
+  def get(self, key, loader, count:bool=True):
+    with self._lock:
+      dataset = self._lookup(key, count)
+      if dataset is not None:
+        self.hits += 1
+        return dataset
+    with self._key_lock(key):
+      dataset = self._lookup(key, False)
+      if dataset is None:
+        with self._lock:
+          self.misses += 1
+        dataset = self.put(key, loader())
+    return dataset
+
+  def put(self, key, dataset):
+    dataset = freeze_dataset(dataset)
+    size = dataset_nbytes(dataset)
+    with self._lock:
+      if key in self._entries:
+        self.nbytes -= self._sizes.pop(key)
+        del self._entries[key]
+      self._entries[key] = dataset
+      self._sizes[key] = size
+      self.nbytes += size
+      while self.nbytes > self.max_bytes and len(self._entries) > 1:
+        evicted, _ = self._entries.popitem(last=False)
+        self.nbytes -= self._sizes.pop(evicted)
+        if verbose:
+          print(f'Evicted region dataset: {evicted} from cache ...')
+    return dataset
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def invalidate(self, key=None):
+    with self._lock:
+      if key is None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+      elif key in self._entries:
+        del self._entries[key]
+        self.nbytes -= self._sizes.pop(key)
+
+  def popular(self, count:int=REGION_WARMUP_COUNT)->list:
+    with self._lock:
+      return [key for key, _ in self.popularity.most_common(count)]
+
+  def warm_up(self, keys, bulk_loader, background:bool=True, loader=None):
+    with self._lock:
+      keys = [key for key in dict.fromkeys(keys) if key not in self._entries and key not in self._warming]
+      self._warming.update(keys)
+    if not keys:
+      return None
+
+    def load_datasets():
+      try:
+        for key, dataset in bulk_loader(keys).items():
+          if dataset is not None and key not in self._entries:
+            self.put(key, dataset)
+      except Exception as e:
+        e = getattr(e, 'message', repr(e))
+        print(f'Failed warming up region datasets due to: {e} ...')
+      finally:
+        with self._lock:
+          self._warming.difference_update(keys)
+
+    if not background:
+      return load_datasets()
+    try:
+      return (loader or dataset_loader).submit(('region_warmup', tuple(keys)), load_datasets)
+    except RuntimeError as e:
+      with self._lock:
+        self._warming.difference_update(keys)
+      e = getattr(e, 'message', repr(e))
+      print(f'Failed scheduling region warm up due to: {e} ...')
+      return None
+
+  def stats(self)->dict:
+    with self._lock:
+      return {
+        'regions': len(self._entries),
+        'nbytes': self.nbytes,
+        'max_bytes': self.max_bytes,
+        'hits': self.hits,
+        'misses': self.misses,
+        'popular': self.popular()
+      }
+
+region_datasets = RegionLRUCache()
+
+CANONICAL_STATES = [
+  'Andaman and Nicobar Islands', 'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar',
+  'Chandigarh', 'Chhattisgarh', 'Dadra and Nagar Haveli and Daman and Diu', 'Delhi', 'Goa',
+  'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jammu and Kashmir', 'Jharkhand', 'Karnataka',
+  'Kerala', 'Ladakh', 'Lakshadweep', 'Madhya Pradesh', 'Maharashtra', 'Manipur', 'Meghalaya',
+  'Mizoram', 'Nagaland', 'Odisha', 'Puducherry', 'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu',
+  'Telangana', 'Tripura', 'Uttar Pradesh', 'Uttarakhand', 'West Bengal', 'India'
+]
+
+STATE_ALIASES = {
+  'Karanataka': 'Karnataka',
+  'Himanchal Pradesh': 'Himachal Pradesh',
+  'Telengana': 'Telangana',
+  'Dadra and Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+  'Dadar Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+  'Dadra Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+  'Daman & Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+  'Daman and Diu': 'Dadra and Nagar Haveli and Daman and Diu'
+}
+
+STATE_NAME_PATTERN = re.compile('[^A-Za-z ]+')
+
+def clean_state_name(state)->str:
+  return ' '.join(STATE_NAME_PATTERN.sub('', str(state)).split())
+
+class StateRegistry():
+  def __init__(self, states=CANONICAL_STATES, aliases=STATE_ALIASES):
+    self.states = []
+    self.ids = dict()
+    self._lock = threading.Lock()
+    self._aliases = {clean_state_name(alias): state for alias, state in aliases.items()}
+    self._resolved = dict()
+    for state in states:
+      self.register(state)
+
+  def register(self, state:str)->int:
+    with self._lock:
+      if state not in self.ids:
+        self.ids[state] = len(self.states)
+        self.states.append(state)
+      return self.ids[state]
+
+  def canonical(self, state)->str:
+    try:
+      return self._resolved[state]
+    except (KeyError, TypeError):
+      pass
+    cleaned_state = clean_state_name(state)
+    canonical_state = self._aliases.get(cleaned_state, cleaned_state)
+    self.register(canonical_state)
+    try:
+      self._resolved[state] = canonical_state
+    except TypeError:
+      pass
+    return canonical_state
+
+  def normalize(self, states:'Pandas series')->tuple:
+    codes, unique_states = pd.factorize(states, use_na_sentinel=False)
+    canonical_states = np.array([self.canonical(state) for state in unique_states], dtype=object)
+    state_ids = np.array([self.ids[state] for state in canonical_states], dtype='int16')
+    return canonical_states[codes], state_ids[codes]
+
+  def state_id(self, state)->int:
+    return self.ids[self.canonical(state)]
+
+  def name(self, state_id:int)->str:
+    return self.states[state_id]
+
+  def __len__(self):
+    return len(self.states)
+
+state_registry = StateRegistry()
+
+def apply_corrections(input_df:'Pandas dataframe')->'Pandas dataframe':
+  states, state_ids = state_registry.normalize(input_df['state'])
+  input_df['state'] = states
+  input_df['state_id'] = state_ids
+  return input_df
+
+def state_indexed(input_df:'Pandas dataframe')->'Pandas dataframe':
+  if input_df.index.name == 'state_id':
+    return input_df
+  if 'state_id' not in input_df.columns:
+    input_df = apply_corrections(input_df.copy())
+  return input_df.set_index('state_id')
+
+def merge_on_state(left_df:'Pandas dataframe', right_df:'Pandas dataframe', how:str='left')->'Pandas dataframe':
+  if 'state_id' not in left_df.columns:
+    left_df = apply_corrections(left_df.copy())
+  right_df = state_indexed(right_df).drop(columns=['state'], errors='ignore')
+  return left_df.join(right_df, on='state_id', how=how, lsuffix='_x', rsuffix='_y')
+
+def _cache_key(pointer:str)->str:
+  return hashlib.sha1(pointer.encode('utf-8')).hexdigest()[:16]
+
+def _cache_entry_dir(pointer:str)->str:
+  return os.path.join(CACHE_DIR, CACHE_VERSION, _cache_key(pointer))
+
+def _pointer_to_path(data_dir:str, pointer:str)->str:
+  return os.path.join(data_dir, *pointer.strip('/').split('/'))
+
+def _file_sha256(file_path:str)->str:
+  sha = hashlib.sha256()
+  with open(file_path, 'rb') as f:
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+      sha.update(chunk)
+  return sha.hexdigest()
+
+def asset_url(data_url:str, pointer:str)->str:
+  return f'{data_url}{quote(pointer)}'
+
+def read_cache_meta(pointer:str)->dict:
+  meta_file = os.path.join(_cache_entry_dir(pointer), 'meta.json')
+  try:
+    with open(meta_file, 'r') as f:
+      return json.load(f)
+  except Exception:
+    return {}
+
+def _write_cache_meta(pointer:str, meta:dict):
+  entry_dir = _cache_entry_dir(pointer)
+  tmp_file = os.path.join(entry_dir, f'meta.json.{os.getpid()}.tmp')
+  with open(tmp_file, 'w') as f:
+    json.dump(meta, f)
+  os.replace(tmp_file, os.path.join(entry_dir, 'meta.json'))
+
+def cached_asset_path(pointer:str)->'str or None':
+  meta = read_cache_meta(pointer)
+  if not meta.get('version'):
+    return None
+  cached_file = os.path.join(_cache_entry_dir(pointer), meta['version'])
+  return cached_file if os.path.exists(cached_file) else None
+
+def store_asset(pointer:str, content:bytes, etag=None, last_modified=None, source=None)->str:
+  sha256 = hashlib.sha256(content).hexdigest()
+  _, ext = os.path.splitext(pointer)
+  version = f'{sha256[:16]}{ext}'
+  entry_dir = _cache_entry_dir(pointer)
+  with _cache_lock:
+    os.makedirs(entry_dir, exist_ok=True)
+    meta = read_cache_meta(pointer)
+    previous_version = meta.get('version')
+    version_file = os.path.join(entry_dir, version)
+    if not os.path.exists(version_file):
+      tmp_file = f'{version_file}.{os.getpid()}.tmp'
+      with open(tmp_file, 'wb') as f:
+        f.write(content)
+      os.replace(tmp_file, version_file)
+    meta.update({
+      'pointer': pointer,
+      'version': version,
+      'sha256': sha256,
+      'etag': etag if etag is not None else meta.get('etag') if previous_version == version else None,
+      'last_modified': last_modified if last_modified is not None else \
+                       meta.get('last_modified') if previous_version == version else None,
+      'checked_at': time.time(),
+      'stored_at': meta.get('stored_at') if previous_version == version else time.time(),
+      'source': source or meta.get('source')
+    })
+    _write_cache_meta(pointer, meta)
+    if previous_version and previous_version != version:
+      try:
+        os.remove(os.path.join(entry_dir, previous_version))
+      except OSError:
+        pass
+      if verbose:
+        print(f'Updated cached asset: {pointer} to version: {version} ...')
+  return version_file
+
+def seed_asset(pointer:str, local_file:str)->str:
+  with open(local_file, 'rb') as f:
+    content = f.read()
+  return store_asset(pointer, content, source=local_file)
+
+def is_offline()->bool:
+  return OFFLINE_MODE or time.time() < _offline_until
+
+def mark_offline(e=None):
+  global _offline_until
+  _offline_until = time.time() + OFFLINE_BACKOFF
+  if e is not None:
+    print(f'Remote data unreachable due to: {e}, using local data for the next {OFFLINE_BACKOFF} seconds ...')
+
+def probe_remote(url:str, timeout:float=REMOTE_TIMEOUT)->bool:
+  if is_offline():
+    return False
+  parts = urlsplit(url)
+  port = parts.port or (443 if parts.scheme == 'https' else 80)
+  try:
+    socket.create_connection((parts.hostname, port), timeout=timeout).close()
+    return True
+  except Exception as e:
+    mark_offline(getattr(e, 'message', repr(e)))
+    return False
+
+def fetch_remote_asset(pointer:str, url:str, conditional:bool=True)->'str or None':
+  meta = read_cache_meta(pointer) if conditional else {}
+  headers = {}
+  if meta.get('etag'):
+    headers['If-None-Match'] = meta['etag']
+  if meta.get('last_modified'):
+    headers['If-Modified-Since'] = meta['last_modified']
+  status, response_headers, content = connection_pool.request(url, headers=headers)
+  if status == 304:
+    with _cache_lock:
+      meta = read_cache_meta(pointer)
+      meta['checked_at'] = time.time()
+      _write_cache_meta(pointer, meta)
+    return cached_asset_path(pointer)
+  if status != 200:
+    raise ConnectionError(f'HTTP status: {status} for: {url}')
+  return store_asset(
+    pointer,
+    content,
+    etag=response_headers.get('ETag'),
+    last_modified=response_headers.get('Last-Modified'),
+    source=url
+  )
+
+def revalidate_asset(pointer:str, url:str):
+  try:
+    if probe_remote(url):
+      fetch_remote_asset(pointer, url)
+  except Exception as e:
+    e = getattr(e, 'message', repr(e))
+    if verbose:
+      print(f'Failed revalidating cached asset: {pointer} due to: {e} ...')
+  finally:
+    with _cache_lock:
+      _revalidating.discard(pointer)
+
+def schedule_revalidation(pointer:str, url:str, force:bool=False)->bool:
+  if is_offline():
+    return False
+  meta = read_cache_meta(pointer)
+  if not force and time.time() - meta.get('checked_at', 0) < REVALIDATION_INTERVAL:
+    return False
+  with _cache_lock:
+    if pointer in _revalidating:
+      return False
+    _revalidating.add(pointer)
+  _revalidation_executor.submit(revalidate_asset, pointer, url)
+  return True
+
+def _bundled_asset_path(pointer:str, local_dirs)->'str or None':
+  for data_dir in list(local_dirs or []) + [REPO_DATA_DIR]:
+    if data_dir and os.path.exists(_pointer_to_path(data_dir, pointer)):
+      return _pointer_to_path(data_dir, pointer)
+  return None
+
+def get_local_asset(pointer:str, data_url:str, local_dirs=None, revalidate:bool=True)->'str or None':
+  url = asset_url(data_url, pointer)
+  cached_file = cached_asset_path(pointer)
+  bundled_file = _bundled_asset_path(pointer, local_dirs)
+
+  if bundled_file is not None:
+    meta = read_cache_meta(pointer)
+    if cached_file is None or (
+         os.path.getmtime(bundled_file) > meta.get('stored_at', 0) and \
+         _file_sha256(bundled_file) != meta.get('sha256')
+       ):
+      try:
+        cached_file = seed_asset(pointer, bundled_file)
+        if verbose:
+          print(f'Seeded data cache for: {pointer} from: {bundled_file} ...')
+      except Exception as e:
+        e = getattr(e, 'message', repr(e))
+        print(f'Failed seeding data cache from: {bundled_file} due to: {e} ...')
+        cached_file = bundled_file
+
+  if cached_file is not None:
+    if revalidate:
+      schedule_revalidation(pointer, url)
+    return cached_file
+
+  if not probe_remote(url):
+    return None
+  try:
+    print(f'Fetching: {pointer} from URL ...')
+    return fetch_remote_asset(pointer, url, conditional=False)
+  except Exception as e:
+    e = getattr(e, 'message', repr(e))
+    print(f'Failed reading URL data for: {pointer} due to: {e} ...')
+    return None
+
+def prefetch_assets(pointers, data_url:str, local_dirs=None, reader=None, max_workers:int=MAX_CONNECTIONS)->tuple:
+  unique_pointers = list(dict.fromkeys(pointers))
+  results, latencies = dict(), dict()
+  if not unique_pointers:
+    return results, latencies
+
+  def load_asset(pointer):
+    start_time = time.perf_counter()
+    asset_file = get_local_asset(pointer, data_url, local_dirs=local_dirs)
+    if asset_file is not None and reader is not None:
+      asset_file = reader(asset_file)
+    return asset_file, time.perf_counter() - start_time
+
+  with ThreadPoolExecutor(
+         max_workers=max(1, min(max_workers, len(unique_pointers))),
+         thread_name_prefix='prefetch'
+       ) as executor:
+    futures = {executor.submit(load_asset, pointer): pointer for pointer in unique_pointers}
+    for future in as_completed(futures):
+      pointer = futures[future]
+      try:
+        results[pointer], latencies[pointer] = future.result()
+      except Exception as e:
+        e = getattr(e, 'message', repr(e))
+        print(f'Failed prefetching: {pointer} due to: {e} ...')
+        results[pointer], latencies[pointer] = None, None
+  return results, latencies
@@ -0,0 +1,66 @@
+import os, numpy as np
+
+SERIES_DECIMATION_POINTS = int(os.environ.get('SARS_COV2_SERIES_POINTS', 500))
+SERIES_OVERVIEW_RATIO = float(os.environ.get('SARS_COV2_SERIES_OVERVIEW_RATIO', 0.25))
+
+verbose = False
+
+def normalized_columns(ys)->'Numpy array':
+  ys = np.atleast_2d(np.asarray(ys, dtype=np.float64))
+  spans = np.ptp(ys, axis=1, keepdims=True) if ys.shape[1] else np.ones((len(ys), 1))
+  spans[spans == 0] = 1.
+  return ys/spans
+
+def lttb_indices(x, ys, threshold:int)->'Numpy array':
+  x = np.asarray(x, dtype=np.float64)
+  n = len(x)
+  if (threshold >= n) or (threshold < 3):
+    return np.arange(n)
+  ys = normalized_columns(ys)
+
+  edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+  x_sums = np.concatenate([[0.], np.cumsum(x)])
+  y_sums = np.concatenate([np.zeros((len(ys), 1)), np.cumsum(ys, axis=1)], axis=1)
+  counts = edges[2:] - edges[1:-1]
+  avg_x = np.append((x_sums[edges[2:]] - x_sums[edges[1:-1]])/counts, x[-1])
+  avg_y = np.concatenate(
+    [(y_sums[:, edges[2:]] - y_sums[:, edges[1:-1]])/counts, ys[:, -1:]], axis=1
+  )
+
+  selected = np.empty(threshold, dtype=np.int64)
+  selected[0], selected[-1] = 0, n - 1
+  a = 0
+  for bucket in range(threshold - 2):
+    lo, hi = edges[bucket], edges[bucket + 1]
+    ay = ys[:, a:a + 1]
+    area = np.abs(
+      (x[a] - avg_x[bucket])*(ys[:, lo:hi] - ay) - (x[a] - x[lo:hi])*(avg_y[:, bucket:bucket + 1] - ay)
+    ).sum(axis=0)
+    a = lo + int(area.argmax())
+    selected[bucket + 1] = a
+  return selected
+
+def finite_bound(value)->bool:
+  return (value is not None) and bool(np.isfinite(value))
+
+def series_window(x, start=None, end=None)->tuple:
+  n = len(x)
+  lo = 0 if not finite_bound(start) else max(int(np.searchsorted(x, start, side='left')) - 1, 0)
+  hi = n if not finite_bound(end) else min(int(np.searchsorted(x, end, side='right')) + 1, n)
+  return (lo, hi) if lo < hi else (0, n)
+
+def decimation_indices(x, ys, window:tuple=None, points:int=SERIES_DECIMATION_POINTS)->'Numpy array':
+  n = len(x)
+  lo, hi = window or (0, n)
+  if n <= points:
+    return np.arange(n)
+  if (lo, hi) == (0, n):
+    return lttb_indices(x, ys, points)
+
+  ys = np.atleast_2d(np.asarray(ys))
+  overview = lttb_indices(x, ys, max(int(SERIES_OVERVIEW_RATIO*points), 3))
+  detail = lo + lttb_indices(x[lo:hi], ys[:, lo:hi], points)
+  return np.union1d(overview[(overview < lo) | (overview >= hi)], detail)
+
+def decimate_series(series:dict, indices)->dict:
+  return {column: np.take(values, indices) for column, values in series.items()}
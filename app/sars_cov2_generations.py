@@ -0,0 +1,188 @@
+import os, json, time, shutil, hashlib, weakref, numpy as np
+
+from contextlib import contextmanager
+from sars_cov2_data import CACHE_DIR
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+GENERATION_FORMAT_VERSION = 1
+GENERATION_DIR = os.environ.get(
+  'SARS_COV2_GENERATION_DIR',
+  os.path.join(CACHE_DIR, 'generations')
+)
+KEEP_GENERATIONS = int(os.environ.get('SARS_COV2_KEEP_GENERATIONS', 2))
+CURRENT_POINTER = 'CURRENT'
+
+verbose = False
+attached_generations = weakref.WeakSet()
+
+@contextmanager
+def generation_lock(root:str):
+  os.makedirs(root, exist_ok=True)
+  with open(os.path.join(root, '.lock'), 'a+') as lock_file:
+    if fcntl is not None:
+      fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def file_sha256(file_path:str)->str:
+  with open(file_path, 'rb') as f:
+    return hashlib.sha256(f.read()).hexdigest()
+
+def generation_key(input_files:dict, params:dict=None)->str:
+  digest = hashlib.sha256(
+    json.dumps({'format_version': GENERATION_FORMAT_VERSION, 'params': params}, sort_keys=True).encode()
+  )
+  for name in sorted(input_files):
+    digest.update(f'{name}:{file_sha256(input_files[name])}\n'.encode())
+  return digest.hexdigest()[:16]
+
+def packable_array(values)->np.ndarray:
+  values = np.asarray(values)
+  if values.dtype == object:
+    values = values.astype(str)
+  return values
+
+def pack_records(records:dict)->tuple:
+  names = list(records)
+  columns = list(records[names[0]]) if names else []
+  aliases = dict()
+  for column in columns:
+    for target in columns[:columns.index(column)]:
+      if target not in aliases and all(
+        np.array_equal(records[name][column], records[name][target]) for name in names
+      ):
+        aliases[column] = target
+        break
+
+  lengths = [len(records[name][columns[0]]) if columns else 0 for name in names]
+  offsets = np.zeros(len(names) + 1, dtype=np.int64)
+  np.cumsum(lengths, out=offsets[1:])
+
+  arrays = {'offsets': offsets}
+  for column in columns:
+    if column not in aliases:
+      arrays[column] = np.concatenate([packable_array(records[name][column]) for name in names])
+  return arrays, {'names': names, 'columns': columns, 'aliases': aliases}
+
+def write_generation(root:str, key:str, groups:dict, params:dict=None)->str:
+  generation_dir = os.path.join(root, key)
+  tmp_dir = f'{generation_dir}.{os.getpid()}.tmp'
+  shutil.rmtree(tmp_dir, ignore_errors=True)
+  os.makedirs(tmp_dir)
+
+  meta = {
+    'format_version': GENERATION_FORMAT_VERSION,
+    'key': key,
+    'params': params,
+    'created_at': time.time(),
+    'groups': dict()
+  }
+  try:
+    for group, records in groups.items():
+      arrays, group_meta = pack_records(records)
+      for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{group}.{name}.npy'), values, allow_pickle=False)
+      meta['groups'][group] = group_meta
+
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+      json.dump(meta, f)
+  except Exception:
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    raise
+
+  try:
+    os.replace(tmp_dir, generation_dir)
+  except OSError:
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if not os.path.exists(os.path.join(generation_dir, 'meta.json')):
+      raise
+  return generation_dir
+
+def current_generation_key(root:str=None)->'str or None':
+  try:
+    with open(os.path.join(root or GENERATION_DIR, CURRENT_POINTER)) as f:
+      return f.read().strip() or None
+  except OSError:
+    return None
+
+def publish_generation(root:str, key:str):
+  tmp_pointer = os.path.join(root, f'{CURRENT_POINTER}.{os.getpid()}.tmp')
+  with open(tmp_pointer, 'w') as f:
+    f.write(key)
+  os.replace(tmp_pointer, os.path.join(root, CURRENT_POINTER))
+
+def prune_generations(root:str, keep:int=KEEP_GENERATIONS):
+  current = current_generation_key(root)
+  attached = {generation.key for generation in list(attached_generations)}
+  generations = sorted(
+    (entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.endswith('.tmp')),
+    key=lambda entry: entry.stat().st_mtime, reverse=True
+  )
+  for entry in generations[max(keep, 1):]:
+    if (entry.name != current) and (entry.name not in attached):
+      shutil.rmtree(entry.path, ignore_errors=True)
+
+class DatasetGeneration():
+  def __init__(self, generation_dir:str):
+    with open(os.path.join(generation_dir, 'meta.json')) as f:
+      self.meta = json.load(f)
+    self.generation_dir = generation_dir
+    self.key = self.meta['key']
+    self.groups = self.meta['groups']
+    self.observed_current_key = None
+    self._index = {group: {name: idx for idx, name in enumerate(meta['names'])} for group, meta in self.groups.items()}
+    self._arrays = {
+      (group, name): np.load(os.path.join(generation_dir, f'{group}.{name}.npy'), mmap_mode='r') \
+        for group, meta in self.groups.items() \
+        for name in ['offsets'] + [column for column in meta['columns'] if column not in meta['aliases']]
+    }
+    attached_generations.add(self)
+
+  def array(self, group:str, name:str)->np.ndarray:
+    return self._arrays[(group, name)]
+
+  def names(self, group:str)->list:
+    return list(self.groups.get(group, dict()).get('names', []))
+
+  def record(self, group:str, name:str)->'dict or None':
+    idx = self._index.get(group, dict()).get(name)
+    if idx is None:
+      return None
+    group_meta = self.groups[group]
+    offsets = self.array(group, 'offsets')
+    start, end = offsets[idx], offsets[idx + 1]
+    return {
+      column: self.array(group, group_meta['aliases'].get(column, column))[start:end] \
+        for column in group_meta['columns']
+    }
+
+  def nbytes(self)->int:
+    return sum(
+      entry.stat().st_size for entry in os.scandir(self.generation_dir) if entry.name.endswith('.npy')
+    )
+
+  def __repr__(self):
+    return f"DatasetGeneration(key={self.key}, groups={ {group: len(meta['names']) for group, meta in self.groups.items()} })"
+
+def open_generation(key:str, builder, root:str=None, params:dict=None)->DatasetGeneration:
+  root = root or GENERATION_DIR
+  generation_dir = os.path.join(root, key)
+  if (not os.path.exists(os.path.join(generation_dir, 'meta.json'))) or (current_generation_key(root) != key):
+    with generation_lock(root):
+      if not os.path.exists(os.path.join(generation_dir, 'meta.json')):
+        started = time.perf_counter()
+        write_generation(root, key, builder(), params=params)
+        print(f'Built shared dataset generation: {key} in {time.perf_counter() - started:.2f}s ...')
+      if current_generation_key(root) != key:
+        publish_generation(root, key)
+        prune_generations(root)
+  elif verbose:
+    print(f'Attaching to shared dataset generation: {key} ...')
+  return DatasetGeneration(generation_dir)
@@ -0,0 +1,261 @@
+import os, json, shutil, hashlib, argparse, \
+       numpy as np, pandas as pd
+
+from sars_cov2_data import CACHE_DIR, REPO_DATA_DIR, apply_corrections
+
+GEOMETRY_FORMAT_VERSION = 1
+GEOMETRY_CRS = 'EPSG:3857'
+GEOMETRY_SOURCE_FILE = os.path.join(REPO_DATA_DIR, 'GeoJSON_assets', 'India_statewise.geojson')
+GEOMETRY_ARTIFACT_DIR = os.environ.get(
+  'SARS_COV2_GEOMETRY_DIR',
+  os.path.join(CACHE_DIR, 'geometry')
+)
+
+GEOMETRY_LOD_RATIOS = tuple(
+  float(r) for r in os.environ.get('SARS_COV2_GEOMETRY_LOD_RATIOS', '0.25,0.5,1.0').split(',')
+)
+GEOMETRY_LOD_SPANS = tuple(
+  float(s) for s in os.environ.get('SARS_COV2_GEOMETRY_LOD_SPANS', '2.0e6,8.0e5').split(',')
+)
+MIN_RING_POINTS = 8
+SMALL_REGION_MAX_AREA = float(os.environ.get('SARS_COV2_SMALL_REGION_MAX_AREA', 2.5e9))
+
+verbose = False
+
+def simplify_ring(coords, ratio:float)->'Numpy array':
+  coords = np.asarray(coords, dtype=np.float64)[:, :2]
+  if (ratio >= 1.) or (len(coords) <= MIN_RING_POINTS):
+    return coords
+
+  import visvalingamwyatt
+
+  ring = coords[:-1] if np.array_equal(coords[0], coords[-1]) else coords
+  number = max(MIN_RING_POINTS - 1, int(np.ceil(ratio*len(ring))))
+  if number >= len(ring):
+    return coords
+  simplified = np.asarray(visvalingamwyatt.Simplifier(ring).simplify(number=number))
+  return np.vstack([simplified, simplified[:1]])
+
+def simplify_polygon(polygon, ratio:float)->'Shapely polygon':
+  from shapely.geometry import Polygon
+
+  return Polygon(
+    simplify_ring(polygon.exterior.coords, ratio),
+    [simplify_ring(interior.coords, ratio) for interior in polygon.interiors]
+  )
+
+def simplify_geometry(geometry, ratio:float)->'Shapely geometry':
+  if (ratio >= 1.) or (geometry is None):
+    return geometry
+
+  from shapely.geometry import Polygon, MultiPolygon
+
+  if isinstance(geometry, MultiPolygon):
+    return MultiPolygon([simplify_polygon(polygon, ratio) for polygon in geometry.geoms])
+  if isinstance(geometry, Polygon):
+    return simplify_polygon(geometry, ratio)
+  return geometry
+
+def geometry_levels(geo_df:'GeoPandas dataframe', ratios=GEOMETRY_LOD_RATIOS)->tuple:
+  levels = []
+  for ratio in ratios:
+    if ratio >= 1.:
+      levels.append(geo_df)
+      continue
+    level_df = geo_df.copy()
+    level_df['geometry'] = [simplify_geometry(geometry, ratio) for geometry in geo_df.geometry]
+    levels.append(level_df)
+  return tuple(levels)
+
+def geometry_lod_level(span:float, spans=GEOMETRY_LOD_SPANS)->int:
+  if (span is None) or (not np.isfinite(span)):
+    return 0
+  return int(sum(span < s for s in spans))
+
+def geometry_buffers(geometries)->dict:
+  import shapely
+
+  geometries = np.asarray(geometries, dtype=object)
+  parts, part_index = shapely.get_parts(geometries, return_index=True)
+  coords, ring_index = shapely.get_coordinates(
+    shapely.get_exterior_ring(parts), return_index=True
+  )
+
+  ring_sizes = np.bincount(ring_index, minlength=len(parts))
+  part_counts = np.bincount(part_index, minlength=len(geometries))
+  geometry_sizes = np.bincount(part_index, weights=ring_sizes, minlength=len(geometries)).astype(np.int64)
+  geometry_sizes += np.clip(part_counts - 1, 0, None)
+
+  separators = np.cumsum(ring_sizes)[:-1][part_index[:-1] == part_index[1:]]
+  offsets = np.zeros(len(geometries) + 1, dtype=np.int64)
+  np.cumsum(geometry_sizes, out=offsets[1:])
+
+  return {
+    'xs': np.insert(coords[:, 0], separators, np.nan),
+    'ys': np.insert(coords[:, 1], separators, np.nan),
+    'offsets': offsets
+  }
+
+def split_buffer(buffer, offsets)->list:
+  return [buffer[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+def attribute_columns(input_df:'Pandas dataframe', exclude=('geometry',))->dict:
+  columns = dict()
+  for column in input_df.columns:
+    if column in exclude:
+      continue
+    values = input_df[column]
+    if pd.api.types.is_bool_dtype(values):
+      columns[column] = values.to_numpy(dtype=np.bool_)
+    elif pd.api.types.is_integer_dtype(values):
+      columns[column] = values.to_numpy(dtype=np.int32)
+    elif pd.api.types.is_float_dtype(values):
+      columns[column] = values.to_numpy(dtype=np.float64)
+    else:
+      columns[column] = values.astype(str).to_numpy(dtype=object)
+  return columns
+
+def merge_attribute_columns(*column_sets)->dict:
+  columns = dict()
+  for column_set in column_sets:
+    for column, values in column_set.items():
+      if (column in columns) and (not np.array_equal(columns[column], values)):
+        raise ValueError(f'Conflicting values for shared map attribute column: {column} ...')
+      columns.setdefault(column, values)
+  return columns
+
+def small_region_markers(geo_df:'GeoPandas dataframe', max_area:float=SMALL_REGION_MAX_AREA)->dict:
+  import shapely
+
+  parts, part_index = shapely.get_parts(geo_df.geometry.values, return_index=True)
+  states = geo_df['state'].to_numpy()[part_index]
+  largest_part = pd.Series(shapely.area(parts)).groupby(states).transform('max').to_numpy()
+  small = largest_part < max_area
+
+  coords, ring_index = shapely.get_coordinates(
+    shapely.get_exterior_ring(parts[small]), return_index=True
+  )
+  ring_sizes = np.bincount(ring_index, minlength=small.sum())
+
+  return {
+    'row': part_index[small],
+    'x': np.bincount(ring_index, weights=coords[:, 0], minlength=small.sum())/ring_sizes,
+    'y': np.bincount(ring_index, weights=coords[:, 1], minlength=small.sum())/ring_sizes
+  }
+
+def file_sha256(file_path:str)->str:
+  with open(file_path, 'rb') as f:
+    return hashlib.sha256(f.read()).hexdigest()
+
+def artifact_key(source_sha256:str)->str:
+  params = json.dumps({
+    'format_version': GEOMETRY_FORMAT_VERSION,
+    'crs': GEOMETRY_CRS,
+    'lod_ratios': GEOMETRY_LOD_RATIOS,
+    'small_region_max_area': SMALL_REGION_MAX_AREA
+  }, sort_keys=True)
+  return f'{source_sha256[:16]}-{hashlib.sha256(params.encode()).hexdigest()[:8]}'
+
+def read_projected_geometry(source_path:str, crs:str=GEOMETRY_CRS)->'GeoPandas dataframe':
+  import geopandas
+  return geopandas.read_file(source_path).to_crs(crs)
+
+def explode_geometry(geo_df:'GeoPandas dataframe')->'GeoPandas dataframe':
+  return geo_df.explode(index_parts=False, ignore_index=True)
+
+def compile_geometry(source_path:str, artifact_dir:str)->str:
+  import shapely
+
+  source_sha256 = file_sha256(source_path)
+  geo_df = explode_geometry(apply_corrections(read_projected_geometry(source_path)))
+
+  arrays = {'area': shapely.area(geo_df.geometry.values)}
+  levels = geometry_levels(geo_df)
+  for level, level_df in enumerate(levels):
+    buffers = geometry_buffers(level_df.geometry.values)
+    for name, values in buffers.items():
+      arrays[f'level_{level}_{name}'] = values
+  for name, values in small_region_markers(geo_df).items():
+    arrays[f'markers_{name}'] = values
+
+  properties = geo_df.drop(columns=['geometry', 'state_id'])
+  meta = {
+    'format_version': GEOMETRY_FORMAT_VERSION,
+    'source_file': os.path.basename(source_path),
+    'source_sha256': source_sha256,
+    'crs': GEOMETRY_CRS,
+    'lod_ratios': list(GEOMETRY_LOD_RATIOS),
+    'small_region_max_area': SMALL_REGION_MAX_AREA,
+    'rows': len(geo_df),
+    'levels': len(levels),
+    'vertices': [int(len(arrays[f'level_{level}_xs'])) for level in range(len(levels))],
+    'properties': {column: properties[column].tolist() for column in properties.columns}
+  }
+
+  tmp_dir = f'{artifact_dir}.{os.getpid()}.tmp'
+  shutil.rmtree(tmp_dir, ignore_errors=True)
+  os.makedirs(tmp_dir)
+  for name, values in arrays.items():
+    np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(values))
+  with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+    json.dump(meta, f)
+
+  try:
+    os.replace(tmp_dir, artifact_dir)
+  except OSError:
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if not os.path.exists(os.path.join(artifact_dir, 'meta.json')):
+      raise
+
+  print(f'Compiled {len(geo_df)} projected polygons from: {source_path} into: {artifact_dir} ...')
+  return artifact_dir
+
+def load_geometry_artifact(artifact_dir:str)->dict:
+  with open(os.path.join(artifact_dir, 'meta.json')) as f:
+    meta = json.load(f)
+
+  def load_array(name):
+    return np.load(os.path.join(artifact_dir, f'{name}.npy'), mmap_mode='r')
+
+  levels = []
+  for level in range(meta['levels']):
+    offsets = load_array(f'level_{level}_offsets')
+    levels.append({
+      'xs': split_buffer(load_array(f'level_{level}_xs'), offsets),
+      'ys': split_buffer(load_array(f'level_{level}_ys'), offsets)
+    })
+
+  return {
+    'meta': meta,
+    'properties': pd.DataFrame(meta['properties']),
+    'area': load_array('area'),
+    'levels': tuple(levels),
+    'markers': {name: load_array(f'markers_{name}') for name in ('row', 'x', 'y')}
+  }
+
+def compiled_geometry(source_path:str=GEOMETRY_SOURCE_FILE, artifact_root:str=None, rebuild:bool=False)->dict:
+  artifact_root = artifact_root or GEOMETRY_ARTIFACT_DIR
+  artifact_dir = os.path.join(artifact_root, artifact_key(file_sha256(source_path)))
+  if rebuild or (not os.path.exists(os.path.join(artifact_dir, 'meta.json'))):
+    os.makedirs(artifact_root, exist_ok=True)
+    if rebuild:
+      shutil.rmtree(artifact_dir, ignore_errors=True)
+    compile_geometry(source_path, artifact_dir)
+  elif verbose:
+    print(f'Loading compiled geometry from: {artifact_dir} ...')
+  return load_geometry_artifact(artifact_dir)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Compile the India statewise GeoJSON into a projected, exploded and simplified geometry artifact')
+  parser.add_argument('--source', default=GEOMETRY_SOURCE_FILE)
+  parser.add_argument('--artifact-dir', default=None)
+  parser.add_argument('--rebuild', action='store_true', help='recompile even if an artifact for the source exists')
+  args = parser.parse_args(argv)
+
+  geometry = compiled_geometry(args.source, artifact_root=args.artifact_dir, rebuild=args.rebuild)
+  meta = geometry['meta']
+  print(f"{meta['rows']} polygons, {meta['levels']} levels of detail with {meta['vertices']} vertices, "
+        f"{len(geometry['markers']['row'])} small region markers ...")
+
+if __name__ == '__main__':
+  main()
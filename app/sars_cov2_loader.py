@@ -0,0 +1,149 @@
+import os, weakref, threading
+
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, Future
+
+LOADER_WORKERS = int(os.environ.get('SARS_COV2_LOADER_WORKERS', 4))
+
+verbose = False
+
+class DatasetLoader():
+  def __init__(self, max_workers:int=LOADER_WORKERS):
+    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dataset-load')
+    self._inflight = dict()
+    self._lock = threading.Lock()
+    self.submitted = 0
+    self.coalesced = 0
+    self.cancelled = 0
+
+  def submit(self, key, loader)->'Future':
+    with self._lock:
+      entry = self._inflight.get(key)
+      if entry is not None:
+        entry['waiters'] += 1
+        self.coalesced += 1
+        return entry['future']
+      future = self._executor.submit(loader)
+      self._inflight[key] = {'future': future, 'waiters': 1}
+      self.submitted += 1
+    future.add_done_callback(partial(self._finish, key))
+    return future
+
+  def _finish(self, key, future):
+    with self._lock:
+      entry = self._inflight.get(key)
+      if (entry is not None) and (entry['future'] is future):
+        del self._inflight[key]
+
+  def release(self, key, future)->bool:
+    with self._lock:
+      entry = self._inflight.get(key)
+      if (entry is None) or (entry['future'] is not future):
+        return False
+      entry['waiters'] -= 1
+      if entry['waiters'] > 0:
+        return False
+      del self._inflight[key]
+    if not future.cancel():
+      with self._lock:
+        if (key not in self._inflight) and (not future.done()):
+          self._inflight[key] = {'future': future, 'waiters': 0}
+      return False
+    with self._lock:
+      self.cancelled += 1
+    if verbose:
+      print(f'Cancelled dataset load: {key} ...')
+    return True
+
+  def stats(self)->dict:
+    with self._lock:
+      return {
+        'inflight': len(self._inflight),
+        'submitted': self.submitted,
+        'coalesced': self.coalesced,
+        'cancelled': self.cancelled
+      }
+
+  def shutdown(self):
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+dataset_loader = DatasetLoader()
+
+class SessionLoads():
+  def __init__(self, document, loader:DatasetLoader=None):
+    self._document = weakref.ref(document)
+    self.loader = loader or dataset_loader
+    self._pending = dict()
+    self._lock = threading.Lock()
+    self.closed = False
+
+  @property
+  def document(self):
+    return self._document()
+
+  def _current(self, slot:str, token)->bool:
+    current = self._pending.get(slot)
+    return (not self.closed) and (current is not None) and (current['token'] is token)
+
+  def request(self, slot:str, key, load, apply)->'Future':
+    self.discard(slot)
+    token = object()
+    future = self.loader.submit(key, load)
+    with self._lock:
+      closed = self.closed
+      if not closed:
+        self._pending[slot] = {'key': key, 'future': future, 'token': token}
+    if closed:
+      self.loader.release(key, future)
+      return future
+
+    def deliver(future):
+      with self._lock:
+        if not self._current(slot, token):
+          return
+      document = self.document
+      if document is None:
+        return
+      try:
+        document.add_next_tick_callback(partial(self._apply, slot, token, apply))
+      except Exception as e:
+        e = getattr(e, 'message', repr(e))
+        print(f'Failed handing off dataset load: {key} due to: {e} ...')
+
+    future.add_done_callback(deliver)
+    return future
+
+  def _apply(self, slot:str, token, apply):
+    with self._lock:
+      if not self._current(slot, token):
+        return
+      request = self._pending.pop(slot)
+    future = request['future']
+    if future.cancelled():
+      return
+    error = future.exception()
+    if error is not None:
+      e = getattr(error, 'message', repr(error))
+      print(f"Failed loading dataset: {request['key']} due to: {e} ...")
+      return
+    apply(future.result())
+
+  def discard(self, slot:str)->bool:
+    with self._lock:
+      request = self._pending.pop(slot, None)
+    if request is None:
+      return False
+    self.loader.release(request['key'], request['future'])
+    return True
+
+  def pending(self)->list:
+    with self._lock:
+      return list(self._pending)
+
+  def cancel(self):
+    with self._lock:
+      self.closed = True
+      requests = list(self._pending.values())
+      self._pending.clear()
+    for request in requests:
+      self.loader.release(request['key'], request['future'])
@@ -0,0 +1,119 @@
+import os, time, numpy as np
+
+REFRESH_INTERVAL = float(os.environ.get('SARS_COV2_REFRESH_INTERVAL', 0))
+
+verbose = False
+
+def file_fingerprint(file_path:str)->'tuple or None':
+  try:
+    stat = os.stat(file_path)
+  except (OSError, TypeError):
+    return None
+  return (file_path, stat.st_mtime_ns, stat.st_size)
+
+class DataFileWatcher():
+  def __init__(self, resolver, pointers):
+    self.resolver = resolver
+    self.pointers = list(pointers)
+    self.fingerprints = {pointer: file_fingerprint(resolver(pointer)) for pointer in self.pointers}
+
+  def watch(self, pointers):
+    for pointer in pointers:
+      if pointer not in self.fingerprints:
+        self.pointers.append(pointer)
+        self.fingerprints[pointer] = file_fingerprint(self.resolver(pointer))
+
+  def changed(self)->dict:
+    changed = dict()
+    for pointer in self.pointers:
+      file_path = self.resolver(pointer)
+      fingerprint = file_fingerprint(file_path)
+      if fingerprint != self.fingerprints.get(pointer):
+        self.fingerprints[pointer] = fingerprint
+        changed[pointer] = file_path
+    return changed
+
+def changed_rows(old_values, new_values)->'Numpy array':
+  old_values, new_values = np.asarray(old_values), np.asarray(new_values)
+  changed = old_values != new_values
+  if (old_values.dtype.kind == 'f') and (new_values.dtype.kind == 'f'):
+    changed &= ~(np.isnan(old_values) & np.isnan(new_values))
+  return np.flatnonzero(changed)
+
+def column_patches(old:dict, new:dict, columns=None)->'dict or None':
+  patches = dict()
+  for column in (columns if columns is not None else new):
+    if (column not in old) or (len(old[column]) != len(new[column])):
+      return None
+    rows = changed_rows(old[column], new[column])
+    if len(rows):
+      values = np.asarray(new[column])[rows]
+      patches[column] = list(zip(rows.tolist(), values.tolist()))
+  return patches
+
+def stream_rows(old:dict, new:dict, columns=None)->'dict or None':
+  columns = list(columns if columns is not None else new)
+  if (not columns) or any(column not in old for column in columns):
+    return None
+  old_rows, new_rows = len(old[columns[0]]), len(new[columns[0]])
+  if (new_rows <= old_rows) or any(
+    len(changed_rows(np.asarray(old[column])[:old_rows], np.asarray(new[column])[:old_rows])) for column in columns
+  ):
+    return None
+  return {column: np.asarray(new[column])[old_rows:] for column in columns}
+
+def patch_source(source, patches:dict)->bool:
+  patches = {column: patch for column, patch in (patches or dict()).items() if patch and column in source.data}
+  if not patches:
+    return False
+  for column in patches:
+    values = source.data[column]
+    if isinstance(values, np.ndarray) and not values.flags.writeable:
+      dict.__setitem__(source.data, column, values.copy())
+  source.patch(patches)
+  return True
+
+class DataRefreshService():
+  def __init__(self, watcher:DataFileWatcher, refresher, interval:float=REFRESH_INTERVAL, loader=None):
+    self.watcher = watcher
+    self.refresher = refresher
+    self.interval = interval
+    self.loader = loader
+    self.refreshes = 0
+    self.last_refresh = None
+    self._callback = None
+
+  def poll(self)->bool:
+    try:
+      changed = self.watcher.changed()
+      if not changed:
+        return False
+      started = time.perf_counter()
+      self.refresher(changed)
+      self.refreshes += 1
+      self.last_refresh = time.time()
+      print(f'Refreshed {len(changed)} changed data files in {time.perf_counter() - started:.2f}s ...')
+      return True
+    except Exception as e:
+      e = getattr(e, 'message', repr(e))
+      print(f'Failed refreshing SARS-CoV2 data due to: {e} ...')
+      return False
+
+  def poll_in_background(self):
+    if self.loader is None:
+      return self.poll()
+    return self.loader.submit(('data_refresh', id(self)), self.poll)
+
+  def start(self):
+    if (self.interval <= 0) or (self._callback is not None):
+      return self._callback
+    from tornado.ioloop import PeriodicCallback
+
+    self._callback = PeriodicCallback(self.poll_in_background, 1000*self.interval)
+    self._callback.start()
+    return self._callback
+
+  def stop(self):
+    if self._callback is not None:
+      self._callback.stop()
+      self._callback = None
@@ -0,0 +1,146 @@
+import os, time, weakref, threading, numpy as np
+
+from bokeh.models import ColumnDataSource
+from sars_cov2_data import dataset_nbytes, shared_datasets, region_datasets
+
+SESSION_STATS_INTERVAL = float(os.environ.get('SARS_COV2_SESSION_STATS_INTERVAL', 0))
+
+verbose = False
+
+def is_shared_array(values)->bool:
+  while isinstance(values, np.ndarray):
+    if not values.flags.writeable:
+      return True
+    values = values.base
+  return False
+
+def column_data_nbytes(data)->dict:
+  nbytes = {'owned': 0, 'shared': 0}
+  for values in data.values():
+    arrays = values if isinstance(values, (list, tuple)) else [values]
+    for array in arrays:
+      if isinstance(array, np.ndarray):
+        nbytes['shared' if is_shared_array(array) else 'owned'] += int(array.nbytes)
+      else:
+        nbytes['owned'] += dataset_nbytes(array)
+  return nbytes
+
+class SessionState():
+  def __init__(self, session_id:str, document=None, layout=None):
+    self.session_id = session_id
+    self.created_at = time.time()
+    self.layout = layout
+    self._document = weakref.ref(document) if document is not None else None
+
+  @property
+  def document(self):
+    return self._document() if self._document is not None else None
+
+  def memory(self)->dict:
+    document = self.document
+    nbytes = {'owned': 0, 'shared': 0, 'models': 0, 'sources': 0}
+    if document is None:
+      return nbytes
+    for source in document.select({'type': ColumnDataSource}):
+      for key, value in column_data_nbytes(source.data).items():
+        nbytes[key] += value
+      nbytes['sources'] += 1
+    nbytes['models'] = len(document.models)
+    return nbytes
+
+  def close(self):
+    if self.layout is not None:
+      self.layout.close()
+    self.layout = None
+    self._document = None
+
+class SessionRegistry():
+  def __init__(self):
+    self._sessions = dict()
+    self._lock = threading.Lock()
+    self.opened = 0
+    self.closed = 0
+
+  def open(self, session_id:str, document=None, layout=None)->SessionState:
+    session = SessionState(session_id, document=document, layout=layout)
+    with self._lock:
+      previous = self._sessions.pop(session_id, None)
+      self._sessions[session_id] = session
+      self.opened += 1
+    if previous is not None:
+      previous.close()
+    return session
+
+  def close(self, session_id:str)->bool:
+    with self._lock:
+      session = self._sessions.pop(session_id, None)
+      if session is not None:
+        self.closed += 1
+    if session is None:
+      return False
+    session.close()
+    return True
+
+  def get(self, session_id:str)->'SessionState or None':
+    with self._lock:
+      return self._sessions.get(session_id)
+
+  def sessions(self)->list:
+    with self._lock:
+      return list(self._sessions.values())
+
+  def __contains__(self, session_id:str)->bool:
+    with self._lock:
+      return session_id in self._sessions
+
+  def __len__(self)->int:
+    with self._lock:
+      return len(self._sessions)
+
+  def stats(self)->dict:
+    with self._lock:
+      sessions = list(self._sessions.values())
+      opened, closed = self.opened, self.closed
+
+    session_memory = {session.session_id: session.memory() for session in sessions}
+    owned_bytes = sum(memory['owned'] for memory in session_memory.values())
+    return {
+      'live_sessions': len(sessions),
+      'opened': opened,
+      'closed': closed,
+      'orphaned': sum(session.document is None for session in sessions),
+      'owned_bytes': owned_bytes,
+      'owned_bytes_per_session': owned_bytes/len(sessions) if sessions else 0,
+      'sessions': session_memory,
+      'shared_datasets': len(shared_datasets.keys()),
+      'region_cache_bytes': region_datasets.stats()['nbytes']
+    }
+
+  def summary(self)->str:
+    stats = self.stats()
+    return f"{stats['live_sessions']} live sessions ({stats['opened']} opened, {stats['closed']} closed, " \
+           f"{stats['orphaned']} orphaned), {stats['owned_bytes_per_session']/1024:.1f} KiB owned per session, " \
+           f"{stats['region_cache_bytes']/(1 << 20):.1f} MiB shared region cache"
+
+session_registry = SessionRegistry()
+
+_stats_callback = None
+
+def log_session_stats():
+  print(f'SARS-CoV2 sessions: {session_registry.summary()} ...')
+
+def start_session_stats_logging(interval:float=SESSION_STATS_INTERVAL):
+  global _stats_callback
+  if (interval <= 0) or (_stats_callback is not None):
+    return _stats_callback
+  from tornado.ioloop import PeriodicCallback
+
+  _stats_callback = PeriodicCallback(log_session_stats, 1000*interval)
+  _stats_callback.start()
+  return _stats_callback
+
+def stop_session_stats_logging():
+  global _stats_callback
+  if _stats_callback is not None:
+    _stats_callback.stop()
+    _stats_callback = None
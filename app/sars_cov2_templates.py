@@ -0,0 +1,142 @@
+import os, json, time, threading
+
+from bokeh.document import Document
+from bokeh.models import ColumnDataSource
+from bokeh.core.serialization import Deserializer
+
+TEMPLATE_POOL_SIZE = int(os.environ.get('SARS_COV2_TEMPLATE_POOL_SIZE', 2))
+
+verbose = False
+
+def model_ids(models)->'str or list':
+  if isinstance(models, (list, tuple)):
+    return [model.id for model in models]
+  return models.id if models is not None else None
+
+class DocumentTemplate():
+  def __init__(self, key, roots, bindings:dict=None, title:str=None):
+    started = time.perf_counter()
+    document = Document()
+    for root in roots:
+      document.add_root(root)
+    if title is not None:
+      document.title = title
+
+    self.key = key
+    self.title = document.title
+    self.models = len(document.models)
+    self.bindings = {name: model_ids(models) for name, models in (bindings or dict()).items()}
+    self.source_data = dict()
+    for source in document.select({'type': ColumnDataSource}):
+      self.source_data[source.id] = dict(source.data)
+      source.data = dict()
+    self.serialized = json.dumps(document.to_json(deferred=False))
+    self.build_time = time.perf_counter() - started
+
+  def instantiate(self)->list:
+    roots = Deserializer().deserialize(json.loads(self.serialized))['roots']
+    for root in roots:
+      for source in root.select({'type': ColumnDataSource}):
+        source.data = {
+          column: list(values) if isinstance(values, (list, tuple)) else values \
+            for column, values in self.source_data.get(source.id, dict()).items()
+        }
+      root.references()
+    return roots
+
+  def bind(self, document:'Bokeh document')->dict:
+    def lookup(model_id):
+      if isinstance(model_id, list):
+        return [document.get_model_by_id(i) for i in model_id]
+      return document.get_model_by_id(model_id) if model_id is not None else None
+    return {name: lookup(model_id) for name, model_id in self.bindings.items()}
+
+  def __repr__(self):
+    return f'DocumentTemplate(key={self.key}, models={self.models}, bytes={len(self.serialized)})'
+
+class DocumentTemplateCache():
+  def __init__(self, pool_size:int=TEMPLATE_POOL_SIZE):
+    self.pool_size = pool_size
+    self._template = None
+    self._pool = []
+    self._filling = False
+    self._lock = threading.Lock()
+    self._build_lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  def template(self, key, builder)->DocumentTemplate:
+    template = self._template
+    if (template is not None) and (template.key == key):
+      return template
+    with self._build_lock:
+      template = self._template
+      if (template is None) or (template.key != key):
+        roots, bindings, title = builder()
+        template = DocumentTemplate(key, roots, bindings=bindings, title=title)
+        with self._lock:
+          self._template = template
+          self._pool = []
+        print(f'Built document template: {template} in {template.build_time:.2f}s ...')
+    return template
+
+  def checkout(self, key, builder)->tuple:
+    template = self.template(key, builder)
+    with self._lock:
+      roots = self._pool.pop() if self._template is template and self._pool else None
+    if roots is not None:
+      self.hits += 1
+    else:
+      self.misses += 1
+      roots = template.instantiate()
+    self.fill(template)
+    return template, roots
+
+  def fill(self, template:DocumentTemplate=None, background:bool=True):
+    with self._lock:
+      template = template or self._template
+      if (template is None) or self._filling or (len(self._pool) >= self.pool_size):
+        return None
+      self._filling = True
+
+    def fill_pool():
+      try:
+        while True:
+          with self._lock:
+            if (self._template is not template) or (len(self._pool) >= self.pool_size):
+              break
+          roots = template.instantiate()
+          with self._lock:
+            if self._template is template:
+              self._pool.append(roots)
+      except Exception as e:
+        e = getattr(e, 'message', repr(e))
+        print(f'Failed preparing document template clones due to: {e} ...')
+      finally:
+        with self._lock:
+          self._filling = False
+      if verbose:
+        print(f'Prepared {len(self._pool)} document template clones for: {template.key} ...')
+
+    if not background:
+      return fill_pool()
+    thread = threading.Thread(target=fill_pool, name='template-fill', daemon=True)
+    thread.start()
+    return thread
+
+  def invalidate(self):
+    with self._lock:
+      self._template = None
+      self._pool = []
+
+  def stats(self)->dict:
+    with self._lock:
+      return {
+        'key': self._template.key if self._template is not None else None,
+        'pool': len(self._pool),
+        'pool_size': self.pool_size,
+        'hits': self.hits,
+        'misses': self.misses
+      }
+
+document_templates = DocumentTemplateCache()
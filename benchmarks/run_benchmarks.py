@@ -0,0 +1,327 @@
+import gc, os, sys, json, time, runpy, importlib, shutil, platform, argparse, tempfile, tracemalloc, subprocess, statistics
+
+from functools import partial
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCHMARK_DIR, '..', 'app'))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines', 'baseline.json')
+BASELINE_FORMAT_VERSION = 2
+
+TIME_METRICS = ('wall_time', 'min_time')
+SIZE_METRICS = ('peak_memory', 'document_bytes')
+COMPARED_METRICS = ('min_time',) + SIZE_METRICS
+
+def offline_environment(cache_dir:str)->dict:
+  env = dict(os.environ)
+  env.update({
+    'SARS_COV2_OFFLINE': '1',
+    'SARS_COV2_CACHE_DIR': cache_dir,
+    'SARS_COV2_REFRESH_INTERVAL': '0',
+    'SARS_COV2_SESSION_STATS_INTERVAL': '0'
+  })
+  for name in ('SARS_COV2_GEOMETRY_DIR', 'SARS_COV2_GENERATION_DIR', 'SARS_COV2_ARCHIVE_STORE_DIR'):
+    env.pop(name, None)
+  return env
+
+def import_probe(metric:str):
+  if metric == 'peak_memory':
+    tracemalloc.start()
+  started = time.perf_counter()
+  importlib.import_module('India_SARS_CoV2')
+  wall_time = time.perf_counter() - started
+  if metric == 'peak_memory':
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({'peak_memory': peak_memory}))
+  else:
+    print(json.dumps({'wall_time': wall_time}))
+
+def run_import_probe(metric:str)->float:
+  output = subprocess.run(
+    [sys.executable, os.path.abspath(__file__), '--import-probe', metric],
+    cwd=APP_DIR, env=dict(os.environ), capture_output=True, text=True, check=True
+  ).stdout
+  return json.loads(output.strip().splitlines()[-1])[metric]
+
+def measure_import(repeat:int, trace:bool=True)->dict:
+  sample = {'times': [run_import_probe('wall_time') for _ in range(repeat)]}
+  if trace:
+    sample['peak_memory'] = run_import_probe('peak_memory')
+  return sample
+
+def document_bytes(result)->'int or None':
+  from bokeh.model import Model
+  from bokeh.document import Document
+
+  roots = result if isinstance(result, (list, tuple)) else [result]
+  if not roots or not all(isinstance(root, Model) for root in roots):
+    return None
+  document = Document()
+  for root in roots:
+    document.add_root(root)
+  return len(json.dumps(document.to_json(deferred=False)))
+
+def settle(loader=None, timeout:float=30.):
+  deadline = time.monotonic() + timeout
+  while (loader is not None) and loader.stats()['inflight'] and (time.monotonic() < deadline):
+    time.sleep(0.01)
+  gc.collect()
+
+def timed_call(fn, args)->float:
+  gc.disable()
+  try:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+  finally:
+    gc.enable()
+
+def measure(fn, setup=None, repeat:int=5, size=document_bytes, loader=None, trace:bool=True)->dict:
+  fn(*(setup() if setup is not None else ()))
+  times = []
+  for _ in range(repeat):
+    args = setup() if setup is not None else ()
+    settle(loader)
+    times.append(timed_call(fn, args))
+  sample = {'times': times}
+  if not trace:
+    return sample
+
+  args = setup() if setup is not None else ()
+  settle(loader)
+  tracemalloc.start()
+  result = fn(*args)
+  _, sample['peak_memory'] = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  nbytes = size(result) if size is not None else None
+  if nbytes is not None:
+    sample['document_bytes'] = nbytes
+  return sample
+
+def summarize(samples:list)->dict:
+  round_times = [min(sample['times']) for sample in samples]
+  metrics = {
+    'wall_time': statistics.median([t for sample in samples for t in sample['times']]),
+    'min_time': statistics.median(round_times),
+    'time_spread': max(round_times)/min(round_times) - 1.
+  }
+  metrics.update({metric: samples[0][metric] for metric in SIZE_METRICS if metric in samples[0]})
+  return metrics
+
+def benchmark_stages(m)->list:
+  import pandas as pd
+  from sars_cov2_data import apply_corrections
+  from sars_cov2_geometry import compile_geometry, compiled_geometry, GEOMETRY_SOURCE_FILE
+
+  regions = m.model_performance_regions()
+  scratch_dir = tempfile.mkdtemp(prefix='sars_cov2_bench_')
+
+  def read_raw_frames():
+    return ([
+      pd.read_csv(m.local_data_file(pointer)) for pointer in (
+        m.SARSCOV2_STATS_CSV_FILENAME_POINTER_STR, m.SARSCOV2_FORECASTS_FILENAME_POINTER_STR
+      )
+    ],)
+
+  def geometry_artifact_dir():
+    artifact_dir = os.path.join(scratch_dir, 'geometry')
+    shutil.rmtree(artifact_dir, ignore_errors=True)
+    return (artifact_dir,)
+
+  def map_plot_setup(map_tab):
+    def setup():
+      geosource, marker_source = m.create_map_sources(geometry_lod=True)
+      return (map_tab, geosource, marker_source, m.map_geometry_levels)
+    return setup
+
+  def create_layout(all_tabs=False):
+    def create():
+      plot_layout = m.SARS_COV2_Layout(advanced_mode=m.advanced_mode)
+      sars_cov2_layout, _ = plot_layout.create_sars_cov2_layout()
+      if all_tabs and m.advanced_mode:
+        for tab_idx in range(len(plot_layout.tab_builders)):
+          plot_layout.activate_tab(tab_idx)
+      return sars_cov2_layout
+    return create
+
+  def static_export():
+    export_dir = tempfile.mkdtemp(dir=scratch_dir)
+    cwd = os.getcwd()
+    os.chdir(export_dir)
+    try:
+      runpy.run_path(os.path.join(APP_DIR, 'India_SARS_CoV2.py'), run_name='__main__')
+    finally:
+      os.chdir(cwd)
+    return os.path.join(export_dir, 'India_SARS_CoV2.html')
+
+  stages = [
+    ('apply_corrections', lambda frames: [apply_corrections(frame) for frame in frames], read_raw_frames, None),
+    ('compile_geometry', lambda artifact_dir: compile_geometry(GEOMETRY_SOURCE_FILE, artifact_dir), geometry_artifact_dir, None),
+    ('compiled_geometry', compiled_geometry, None, None),
+    ('load_sars_cov2_datasets', m.load_sars_cov2_datasets, None, None),
+    ('create_map_sources', lambda: m.create_map_sources(geometry_lod=True), None, document_bytes)
+  ]
+  stages += [(f'make_dataset[{region}]', partial(m.make_dataset, region), None, None) for region in regions]
+  stages += [
+    (f'sars_cov2_plot[{title}]', m.create_map_plot, map_plot_setup(map_tab), document_bytes) \
+      for map_tab, title in enumerate(m.MAP_TAB_TITLES[:3 if m.advanced_mode else 1])
+  ]
+  if m.advanced_mode:
+    stages.append((
+      'model_performance_plot', m.model_performance_plot, lambda: (m.model_performance_frame('India'),), document_bytes
+    ))
+  stages += [
+    ('create_sars_cov2_layout', create_layout(), None, document_bytes),
+    ('create_sars_cov2_layout[all tabs]', create_layout(all_tabs=True), None, document_bytes),
+    ('static_export', static_export, None, os.path.getsize)
+  ]
+  return stages, scratch_dir
+
+def run_benchmarks(repeat:int=5, rounds:int=3, only=None)->dict:
+  selected = lambda name: (not only) or any(pattern in name for pattern in only)
+  samples = dict()
+  sys.path.insert(0, APP_DIR)
+  os.chdir(APP_DIR)
+  import India_SARS_CoV2 as m
+  m.load_app_datasets()
+
+  stages, scratch_dir = benchmark_stages(m)
+  try:
+    for round_idx in range(rounds):
+      print(f'Benchmark round: {round_idx + 1}/{rounds} ...')
+      if selected('import'):
+        samples.setdefault('import', []).append(measure_import(repeat, trace=round_idx == 0))
+      for name, fn, setup, size in stages:
+        if selected(name):
+          samples.setdefault(name, []).append(
+            measure(fn, setup=setup, repeat=repeat, size=size, loader=m.dataset_loader, trace=round_idx == 0)
+          )
+  finally:
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+  return {name: summarize(stage_samples) for name, stage_samples in samples.items()}
+
+def benchmark_meta(repeat:int, rounds:int)->dict:
+  import bokeh, numpy, pandas
+
+  return {
+    'format_version': BASELINE_FORMAT_VERSION,
+    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'bokeh': bokeh.__version__,
+    'pandas': pandas.__version__,
+    'numpy': numpy.__version__,
+    'repeat': repeat,
+    'rounds': rounds
+  }
+
+def compare_results(results:dict, baseline:dict, time_tolerance:float, size_tolerance:float, time_floor:float=0., 
+                    repeat:int=None, compare_times:bool=True)->list:
+  baseline_time = 'min_time' if (repeat or 0) >= baseline.get('meta', dict()).get('repeat', 0) else 'wall_time'
+  rows = []
+  for name, metrics in results.items():
+    baseline_metrics = baseline.get('results', dict()).get(name)
+    if baseline_metrics is None:
+      rows.append((name, 'new', None, None, None, False))
+      continue
+    for metric in COMPARED_METRICS:
+      reference = baseline_metrics.get(baseline_time if metric in TIME_METRICS else metric)
+      if (metric not in metrics) or (not reference) or (metric in TIME_METRICS and not compare_times):
+        continue
+      ratio = metrics[metric]/reference
+      if metric in TIME_METRICS:
+        tolerance = max(time_tolerance, baseline_metrics.get('time_spread', 0.) + metrics.get('time_spread', 0.))
+        regression = (ratio > 1. + tolerance) and (metrics[metric] - reference > time_floor)
+      else:
+        regression = ratio > 1. + size_tolerance
+      rows.append((name, metric, reference, metrics[metric], ratio, regression))
+  return rows
+
+def format_metric(metric:str, value)->str:
+  if value is None:
+    return '-'
+  if metric in TIME_METRICS:
+    return f'{1000*value:.1f} ms'
+  return f'{value/1024:.1f} KiB'
+
+def print_results(results:dict):
+  for name, metrics in results.items():
+    print(f"{name:<50} {format_metric('wall_time', metrics['wall_time']):>12} "
+          f"{format_metric('min_time', metrics['min_time']):>12} "
+          f"{format_metric('peak_memory', metrics.get('peak_memory')):>14} "
+          f"{format_metric('document_bytes', metrics.get('document_bytes')):>14}")
+
+def print_comparison(rows:list):
+  for name, metric, old, new, ratio, regression in rows:
+    if metric == 'new':
+      print(f'{name:<50} no baseline')
+      continue
+    print(f'{name:<50} {metric:<15} {format_metric(metric, old):>12} -> {format_metric(metric, new):>12} '
+          f"{100*(ratio - 1.):+7.1f}%{'  REGRESSION' if regression else ''}")
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Benchmark the SARS-CoV2 visualization startup and render pipeline offline against the bundled data')
+  parser.add_argument('--repeat', type=int, default=5, help='timed runs per stage in each round')
+  parser.add_argument('--rounds', type=int, default=3, help='interleaved rounds over all stages, the median of the fastest run per round is compared')
+  parser.add_argument('--only', nargs='*', default=None, help='run only stages whose name contains one of these strings')
+  parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='JSON baseline to compare against')
+  parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+  parser.add_argument('--output', default=None, help='also write the results to this JSON file')
+  parser.add_argument('--time-tolerance', type=float, default=0.25, help='allowed relative time increase, widened by the round to round spread of noisy stages')
+  parser.add_argument('--time-floor', type=float, default=0.002, help='ignore fastest run increases below this many seconds')
+  parser.add_argument('--size-tolerance', type=float, default=0.10, help='allowed relative peak memory and document size increase')
+  parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 if any stage regressed')
+  parser.add_argument('--import-probe', choices=('wall_time', 'peak_memory'), default=None, help=argparse.SUPPRESS)
+  args = parser.parse_args(argv)
+
+  if args.import_probe:
+    sys.path.insert(0, APP_DIR)
+    return import_probe(args.import_probe)
+
+  cache_dir = tempfile.mkdtemp(prefix='sars_cov2_bench_cache_')
+  os.environ.update(offline_environment(cache_dir))
+  try:
+    results = run_benchmarks(repeat=args.repeat, rounds=args.rounds, only=args.only)
+  finally:
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+  report = {'meta': benchmark_meta(args.repeat, args.rounds), 'results': results}
+  print()
+  print_results(results)
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+
+  if args.save_baseline:
+    os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+    with open(args.baseline, 'w') as f:
+      json.dump(report, f, indent=2)
+    print(f'Saved benchmark baseline to: {args.baseline} ...')
+    return 0
+
+  if not os.path.exists(args.baseline):
+    print(f'No benchmark baseline found at: {args.baseline}, run with --save-baseline to create one ...')
+    return 0
+
+  with open(args.baseline) as f:
+    baseline = json.load(f)
+  print(f"\nCompared against baseline from: {baseline['meta'].get('created_at')} (bokeh {baseline['meta'].get('bokeh')}) ...")
+  if args.repeat < baseline['meta'].get('repeat', 0):
+    print(f"Fewer repeats than the baseline: {args.repeat} < {baseline['meta']['repeat']}, comparing against its median times ...")
+  compare_times = baseline['meta'].get('platform') == platform.platform()
+  if not compare_times:
+    print(f"Baseline was recorded on: {baseline['meta'].get('platform')}, comparing sizes only, "
+          f"record a baseline on this host with --save-baseline to compare times ...")
+  rows = compare_results(
+    results, baseline, args.time_tolerance, args.size_tolerance, args.time_floor, args.repeat, compare_times
+  )
+  print_comparison(rows)
+  regressions = [row for row in rows if row[-1]]
+  if regressions:
+    print(f'{len(regressions)} benchmark regressions beyond tolerance ...')
+  return 1 if (regressions and args.fail_on_regression) else 0
+
+if __name__ == '__main__':
+  sys.exit(main())